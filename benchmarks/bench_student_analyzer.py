@@ -0,0 +1,256 @@
+"""Benchmark suite for the StudentAnalyzer hot paths.
+
+Generates synthetic gradebooks, times each stage, and writes the results as JSON
+so runs can be compared across releases:
+
+    python benchmarks/bench_student_analyzer.py --rows 1000 10000 100000 --subjects 5 50
+    python benchmarks/bench_student_analyzer.py --compare bench_results_old.json
+"""
+import argparse
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+sys.path.insert(0, ROOT)
+
+from student_analyzer import StudentAnalyzer  # noqa: E402
+
+# Cold import of the analyzer in a fresh interpreter, as a CLI/batch worker pays it
+STARTUP_SNIPPET = (
+    "import sys, time; start = time.perf_counter(); import student_analyzer; "
+    "print(time.perf_counter() - start, 'matplotlib' in sys.modules)"
+)
+
+def bench_startup(repeat):
+    """Time ``import student_analyzer`` in fresh interpreters; also report whether it pulled in matplotlib."""
+    times = []
+    for _ in range(repeat):
+        output = subprocess.run(
+            [sys.executable, '-c', STARTUP_SNIPPET], cwd=ROOT, capture_output=True, text=True, check=True,
+        ).stdout.split()
+        times.append(float(output[0]))
+    return {'best_s': min(times), 'mean_s': sum(times) / len(times), 'matplotlib_loaded': output[1] == 'True'}
+
+def make_gradebook(rows, subjects, seed=0):
+    """Synthetic gradebook: unique names and integer scores 0-100."""
+    rng = np.random.default_rng(seed)
+    data = pd.DataFrame(
+        rng.integers(0, 101, size=(rows, subjects), dtype=np.int64),
+        columns=[f"Subject{i + 1}" for i in range(subjects)],
+    )
+    data.insert(0, 'Name', [f"Student{i + 1}" for i in range(rows)])
+    return data
+
+def measure(func, repeat, memory, setup=None):
+    """Run func ``repeat`` times; return best/mean seconds and (optionally) traced peak bytes.
+
+    ``setup`` runs untimed before every call, e.g. to drop caches so each call is cold.
+    """
+    setup = setup or (lambda: None)
+    # Warm-up call, so imports and first-use allocations are not timed
+    setup()
+    func()
+    times = []
+    for _ in range(repeat):
+        setup()
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    result = {'best_s': min(times), 'mean_s': sum(times) / len(times)}
+    if memory:
+        # Separate traced run, so tracing overhead does not distort the timings
+        setup()
+        tracemalloc.start()
+        func()
+        result['peak_bytes'] = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    return result
+
+def bench_gradebook(path, rows, args):
+    """Time every stage for one gradebook file; returns {stage: measurement}."""
+    results = {}
+    quiet = open(os.devnull, 'w')
+    stdout, sys.stdout = sys.stdout, quiet
+    try:
+        analyzer = StudentAnalyzer(path)
+        names = analyzer.data['Name'].tolist()
+        student = names[len(names) // 2]
+        loop_names = names[:args.loop_limit]
+
+        def full_class_loop():
+            for name in loop_names:
+                analyzer.analyze_student(name)
+
+        # Memoized results are dropped before every call; the rank index and
+        # running stats are kept except where the stage is what builds them
+        memo = analyzer.clear_cache
+        derived = analyzer.invalidate
+        charts = analyzer.clear_chart_cache
+        stages = {
+            'load_data': (lambda: StudentAnalyzer(path), rows, None),
+            'get_class_stats': (analyzer.get_class_stats, rows, derived),
+            'get_class_stats_extended': (lambda: analyzer.get_class_stats(extended=True), rows, memo),
+            'analyze_student': (lambda: analyzer.analyze_student(student), 1, memo),
+            'analyze_student_loop': (full_class_loop, len(loop_names), memo),
+            'analyze_all': (analyzer.analyze_all, rows, memo),
+            'get_recommendations': (lambda: analyzer.get_recommendations(student), 1, memo),
+            'recommend_all': (analyzer.recommend_all, rows, memo),
+            'plot_student_performance': (lambda: analyzer.plot_student_performance(student), 1, charts),
+            'create_report': (lambda: analyzer.create_report(student), 1, memo),
+        }
+        for stage, (func, items, setup) in stages.items():
+            if args.stages and stage not in args.stages:
+                continue
+            result = measure(func, args.repeat, args.memory, setup)
+            result['items'] = items
+            result['items_per_s'] = items / result['best_s'] if result['best_s'] else None
+            results[stage] = result
+    finally:
+        sys.stdout = stdout
+        quiet.close()
+    return results
+
+def run(args):
+    report = {
+        'timestamp': datetime.now(timezone.utc).isoformat(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'numpy': np.__version__,
+        'pandas': pd.__version__,
+        'results': [],
+    }
+    if not args.stages or 'startup' in args.stages:
+        report['startup'] = bench_startup(args.repeat)
+        print(f"\nstartup (import student_analyzer) {report['startup']['best_s'] * 1000:10.2f} ms"
+              f"{'  (loads matplotlib!)' if report['startup']['matplotlib_loaded'] else ''}")
+    workdir = tempfile.mkdtemp(prefix='student_bench_')
+    cwd = os.getcwd()
+    # Charts and reports are written to the working directory
+    os.chdir(workdir)
+    try:
+        # Nothing to generate when only the startup time was asked for
+        subject_counts = [] if args.stages == ['startup'] else args.subjects
+        for subjects in subject_counts:
+            for rows in args.rows:
+                data = make_gradebook(rows, subjects)
+                for file_format in args.formats:
+                    if file_format == 'xlsx' and rows > args.excel_max_rows:
+                        continue
+                    path = os.path.join(workdir, f"gradebook_{rows}x{subjects}.{file_format}")
+                    if file_format == 'csv':
+                        data.to_csv(path, index=False)
+                    else:
+                        data.to_excel(path, index=False)
+                    stages = bench_gradebook(path, rows, args)
+                    report['results'].append({
+                        'rows': rows, 'subjects': subjects, 'format': file_format,
+                        'file_bytes': os.path.getsize(path), 'stages': stages,
+                    })
+                    print_result(report['results'][-1])
+    finally:
+        os.chdir(cwd)
+        # Generated gradebooks, charts and reports can run to gigabytes
+        shutil.rmtree(workdir, ignore_errors=True)
+    return report
+
+def print_result(result):
+    print(f"\n{result['rows']} students x {result['subjects']} subjects ({result['format']}):")
+    for stage, m in result['stages'].items():
+        memory = f"  peak {m['peak_bytes'] / 2**20:8.1f} MiB" if 'peak_bytes' in m else ''
+        rate = f"{m['items_per_s']:12.0f}/s" if m['items_per_s'] else ''
+        print(f"  {stage:26s} {m['best_s'] * 1000:10.2f} ms {rate}{memory}")
+
+def print_scaling(report):
+    """Print best time per stage against rows, one curve per (subjects, format)."""
+    curves = {}
+    for result in report['results']:
+        for stage, m in result['stages'].items():
+            key = (stage, result['subjects'], result['format'])
+            curves.setdefault(key, []).append((result['rows'], m['best_s']))
+    print("\nScaling (rows: ms):")
+    for (stage, subjects, file_format), points in sorted(curves.items()):
+        series = ', '.join(f"{rows}: {seconds * 1000:.2f}" for rows, seconds in sorted(points))
+        print(f"  {stage} [{subjects} subjects, {file_format}] {series}")
+
+def compare(report, baseline_path, tolerance):
+    """Print stages that got slower than the baseline by more than ``tolerance``; return them."""
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+    previous = {
+        (r['rows'], r['subjects'], r['format'], stage): m['best_s']
+        for r in baseline['results'] for stage, m in r['stages'].items()
+    }
+    regressions = []
+    print(f"\nComparison with {baseline_path}:")
+    if 'startup' in report and baseline.get('startup'):
+        ratio = report['startup']['best_s'] / baseline['startup']['best_s']
+        flag = ' REGRESSION' if ratio > 1 + tolerance else ''
+        print(f"  {'startup':26s} {ratio:5.2f}x{flag}")
+        if flag:
+            regressions.append('startup')
+    for r in report['results']:
+        for stage, m in r['stages'].items():
+            key = (r['rows'], r['subjects'], r['format'], stage)
+            if key not in previous or not previous[key]:
+                continue
+            ratio = m['best_s'] / previous[key]
+            flag = ' REGRESSION' if ratio > 1 + tolerance else ''
+            print(f"  {stage:26s} {r['rows']}x{r['subjects']} {r['format']}: {ratio:5.2f}x{flag}")
+            if flag:
+                regressions.append(key)
+    return regressions
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, nargs='+', default=[1000, 10000, 100000],
+                        help="class sizes to generate (up to 1000000)")
+    parser.add_argument('--subjects', type=int, nargs='+', default=[5, 50],
+                        help="subject counts to generate (e.g. 5 50 200)")
+    parser.add_argument('--formats', nargs='+', choices=['csv', 'xlsx'], default=['csv', 'xlsx'])
+    parser.add_argument('--excel-max-rows', type=int, default=10000,
+                        help="skip Excel files larger than this (openpyxl is slow to write)")
+    parser.add_argument('--loop-limit', type=int, default=1000,
+                        help="students timed in the per-student analyze_student loop")
+    parser.add_argument('--stages', nargs='+', help="only run these stages ('startup' for the import time)")
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--no-memory', dest='memory', action='store_false',
+                        help="skip the traced run that measures peak memory")
+    parser.add_argument('--out', default='bench_results.json')
+    parser.add_argument('--compare', help="baseline results JSON to compare against")
+    parser.add_argument('--tolerance', type=float, default=0.25,
+                        help="allowed slowdown before a stage counts as a regression")
+    parser.add_argument('--startup-budget', type=float,
+                        help="fail if importing student_analyzer takes longer than this many seconds")
+    args = parser.parse_args(argv)
+
+    report = run(args)
+    print_scaling(report)
+    with open(args.out, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"\nResults saved as {args.out}")
+
+    failed = bool(args.compare and compare(report, args.compare, args.tolerance))
+    startup = report.get('startup')
+    if startup:
+        # Plotting is imported lazily; analytics-only workers must not pay for it
+        if startup['matplotlib_loaded']:
+            print("\nFAIL: importing student_analyzer loads matplotlib")
+            failed = True
+        if args.startup_budget is not None and startup['best_s'] > args.startup_budget:
+            print(f"\nFAIL: startup took {startup['best_s']:.3f} s (budget {args.startup_budget} s)")
+            failed = True
+    return 1 if failed else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
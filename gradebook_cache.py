@@ -0,0 +1,127 @@
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_CACHE_DIR = '.gradebook_cache'
+DEFAULT_MAX_ENTRIES = 32
+DEFAULT_MAX_BYTES = 1 << 30
+# Bump whenever the stored layout or normalize_scores/compact_scores output changes,
+# so entries written by an older version are never loaded
+FORMAT_VERSION = 3
+
+def content_hash(source):
+    """Return the SHA-256 hex digest of a file path or of raw bytes."""
+    digest = hashlib.sha256()
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        digest.update(source)
+    else:
+        with open(source, 'rb') as f:
+            for block in iter(lambda: f.read(1 << 20), b''):
+                digest.update(block)
+    return digest.hexdigest()
+
+class GradebookCache:
+    """On-disk cache of normalized gradebooks, keyed by the content of the source file.
+
+    Each entry is a directory holding the score matrix as ``scores.npy`` plus one
+    ``.npy`` file per key column (Name, student ID). Key columns keep their values
+    and dtype (object columns are pickled), so a hit is indistinguishable from a
+    fresh parse. Loading memory-maps the score matrix read-only, so reopening an
+    unchanged file costs no parsing at all.
+
+    The cache is bounded: after each store, the least recently used entries beyond
+    ``max_entries`` or ``max_bytes`` are deleted (None lifts a limit). The most
+    recently used entry is always kept.
+    """
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, max_entries=DEFAULT_MAX_ENTRIES,
+                 max_bytes=DEFAULT_MAX_BYTES):
+        self.cache_dir = cache_dir
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+
+    def _entry_path(self, digest, key_columns):
+        # The same file normalized with different key columns is a different entry
+        entry = hashlib.sha256(json.dumps([FORMAT_VERSION, digest, list(key_columns)]).encode()).hexdigest()
+        return os.path.join(self.cache_dir, entry)
+
+    def load(self, digest, key_columns=('Name',)):
+        """Return ``(data, scores)`` for a cached gradebook, or None on a miss."""
+        path = self._entry_path(digest, key_columns)
+        meta_path = os.path.join(path, 'meta.json')
+        if not os.path.exists(meta_path):
+            return None
+        with open(meta_path) as f:
+            meta = json.load(f)
+        try:
+            # The meta file's mtime records the last use, for eviction
+            os.utime(meta_path)
+        except OSError:
+            pass
+
+        scores = np.load(os.path.join(path, 'scores.npy'), mmap_mode='r')
+        data = pd.DataFrame(scores, columns=meta['subjects'], copy=False)
+        for i, col in enumerate(meta['key_columns']):
+            # Object key columns (e.g. mixed names or missing keys) are stored pickled
+            values = np.load(os.path.join(path, f'key_{i}.npy'), allow_pickle=True)
+            data.insert(i, col, pd.Categorical(values) if col == 'Name' else values)
+        return data, scores
+
+    def store(self, digest, data, scores, key_columns=('Name',)):
+        """Write a normalized gradebook (see ``normalize_scores``) into the cache."""
+        path = self._entry_path(digest, key_columns)
+        present_keys = [col for col in data.columns if col in key_columns]
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+        # Build the entry in a scratch directory and rename it into place, so
+        # concurrent readers never see a half-written entry
+        scratch = tempfile.mkdtemp(dir=self.cache_dir)
+        try:
+            np.save(os.path.join(scratch, 'scores.npy'), np.ascontiguousarray(scores))
+            for i, col in enumerate(present_keys):
+                # Saved as-is: numeric keys stay numeric and missing keys stay missing
+                np.save(os.path.join(scratch, f'key_{i}.npy'), data[col].to_numpy())
+            with open(os.path.join(scratch, 'meta.json'), 'w') as f:
+                json.dump({
+                    'key_columns': present_keys,
+                    'subjects': [col for col in data.columns if col not in key_columns],
+                }, f)
+            os.replace(scratch, path)
+        except OSError:
+            # Another process stored the same entry first
+            shutil.rmtree(scratch, ignore_errors=True)
+            if not os.path.exists(path):
+                raise
+        self.prune()
+
+    def prune(self):
+        """Delete the least recently used entries beyond max_entries / max_bytes."""
+        try:
+            names = os.listdir(self.cache_dir)
+        except FileNotFoundError:
+            return
+        entries = []
+        for name in names:
+            path = os.path.join(self.cache_dir, name)
+            try:
+                last_used = os.path.getmtime(os.path.join(path, 'meta.json'))
+                size = sum(entry.stat().st_size for entry in os.scandir(path))
+            except OSError:
+                # A scratch directory still being written, or an entry removed meanwhile
+                continue
+            entries.append((last_used, size, path))
+
+        entries.sort(reverse=True)
+        total = 0
+        for i, (_, size, path) in enumerate(entries):
+            total += size
+            over_count = self.max_entries is not None and i >= self.max_entries
+            over_size = self.max_bytes is not None and total > self.max_bytes
+            if i > 0 and (over_count or over_size):
+                # Readers that already memory-mapped an entry keep their open files
+                shutil.rmtree(path, ignore_errors=True)
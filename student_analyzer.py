@@ -1,155 +1,1306 @@
+import numpy as np
 import pandas as pd
-import matplotlib.pyplot as plt
+import argparse
+import copy
+import glob
+import json
+import logging
+import math
 import os
+import shutil
+import string
+import sys
+import tempfile
+import threading
+import time
+import warnings
+import zipfile
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from io import BytesIO
+
+from gradebook_cache import GradebookCache, content_hash
+from instrumentation import instrumented
+
+logger = logging.getLogger('student_analyzer')
+
+# Supported ranking methods, mapped to the pandas rank method that implements them
+RANK_METHODS = {
+    'competition': 'min',  # 1, 2, 2, 4
+    'dense': 'dense',      # 1, 2, 2, 3
+}
+
+class GradingScheme:
+    """Grade bands given as the lowest percentage that earns each grade.
+
+    Boundaries are kept sorted, so grading a whole column of percentages is one
+    ``np.searchsorted`` call. Anything below the lowest band (or missing) gets
+    ``default``.
+    """
+
+    def __init__(self, bands, default='F'):
+        bands = sorted(bands.items(), key=lambda band: band[1])
+        self.grades = np.array([default] + [grade for grade, _ in bands], dtype=object)
+        self.boundaries = np.array([boundary for _, boundary in bands], dtype=float)
+        self.default = default
+
+    @classmethod
+    def from_config(cls, path):
+        """Load a scheme from a JSON file: {"bands": {"O": 90, ...}, "default": "F"}."""
+        with open(path) as f:
+            config = json.load(f)
+        return cls(config['bands'], config.get('default', 'F'))
+
+    def grade(self, percentages):
+        """Grade an array of percentages; a percentage equal to a boundary earns that band."""
+        percentages = np.asarray(percentages, dtype=float)
+        grades = self.grades[np.searchsorted(self.boundaries, percentages, side='right')]
+        return np.where(np.isnan(percentages), self.default, grades)
+
+DEFAULT_GRADING = GradingScheme({'O': 90, 'E': 80, 'A': 70}, default='F')
+
+class RecommendationRule:
+    """A recommendation given to every student matched by a predicate.
+
+    ``predicate`` takes the rule context (one row per student: the analyze_all
+    columns, every subject's score, 'Failing Subjects', 'Failing Count' and 'Max
+    Average', the highest Average possible under max_marks) and
+    returns a boolean mask. ``message`` is a format string over those columns,
+    e.g. "Focus on improving {Failing Subjects}", or a callable that takes the
+    matched rows and returns one string per row.
+    """
+
+    def __init__(self, name, predicate, message):
+        self.name = name
+        self.predicate = predicate
+        self.message = message
+
+    def render(self, matched):
+        """Return the message for each matched row."""
+        if callable(self.message):
+            return list(self.message(matched))
+        # Rewrite named fields as positional ones so each row is a plain str.format call
+        fields, template = [], []
+        for literal, field, spec, conversion in string.Formatter().parse(self.message):
+            template.append(literal.replace('{', '{{').replace('}', '}}'))
+            if field is not None:
+                if field not in fields:
+                    fields.append(field)
+                template.append('{%d%s%s}' % (
+                    fields.index(field), f'!{conversion}' if conversion else '', f':{spec}' if spec else ''
+                ))
+        template = ''.join(template)
+        columns = [matched[field].tolist() for field in fields]
+        return [template.format(*values) for values in zip(*columns)]
+
+# The tier predicates work on plain arrays: they run several times per lookup, and
+# pandas Series arithmetic costs more than the comparisons themselves
+def _average_at_least(c, percent):
+    """Whether Average reaches ``percent`` percent of the highest possible Average."""
+    return c['Average'].to_numpy() >= percent * c['Max Average'].to_numpy() / 100
+
+def _great(c):
+    return _average_at_least(c, 80) | (c['Percentage'].to_numpy() > 90)
+
+def _good(c):
+    return ~_great(c) & (_average_at_least(c, 65) | (c['Percentage'].to_numpy() > 80))
+
+DEFAULT_RULES = [
+    RecommendationRule(
+        'failing', lambda c: c['Failing Count'] > 0,
+        "Focus on improving {Failing Subjects}",
+    ),
+    RecommendationRule(
+        'great', _great,
+        "Great work! Keep it up! Percentage-{Percentage} ",
+    ),
+    RecommendationRule(
+        'good', _good,
+        "Good progress. Try to improve your weaker subjects {Worst Subject} ({Worst Score}). Percentage -{Percentage} and average-{Average}",
+    ),
+    RecommendationRule(
+        'needs help', lambda c: ~_great(c) & ~_good(c),
+        "Consider getting additional help with {Worst Subject} ({Worst Score}).Percentage -{Percentage} and average-{Average}",
+    ),
+]
+
+def evaluate_rules(context, rules):
+    """Apply every rule to the whole context at once; returns one list of messages per row."""
+    recommendations = [[] for _ in range(len(context))]
+    for rule in rules:
+        matched = np.flatnonzero(np.asarray(rule.predicate(context), dtype=bool))
+        if not len(matched):
+            continue
+        # Skip the row selection when every row matched (always the case for one student)
+        rows = context if len(matched) == len(context) else context.iloc[matched]
+        for i, message in zip(matched, rule.render(rows)):
+            recommendations[i].append(message)
+    return recommendations
+
+def _plain_scores(scores, whole=True):
+    """Scores as an object array of plain Python numbers, vectorized.
+
+    Whole scores become int where ``whole`` (broadcast against ``scores``) is set,
+    see whole_columns.
+    """
+    scores = np.asarray(scores, dtype=np.float64)
+    whole = (scores % 1 == 0) & whole
+    plain = scores.round(2).astype(object)
+    plain[whole] = scores[whole].astype(np.int64).astype(object)
+    return plain
+
+def subject_max_marks(subjects, max_marks=100):
+    """Per-subject maximum marks as an array; ``max_marks`` is one number or a {subject: marks} dict."""
+    if isinstance(max_marks, dict):
+        return np.array([max_marks.get(subject, 100) for subject in subjects], dtype=float)
+    return np.full(len(subjects), max_marks, dtype=float)
+
+def pass_marks(pass_threshold, maxima):
+    """Per-subject pass marks in score units; ``pass_threshold`` is a percentage of each maximum."""
+    return pass_threshold * np.asarray(maxima, dtype=float) / 100
+
+class RankIndex:
+    """Order statistics over student totals, kept as sorted arrays searched by bisection.
+
+    Adding or removing one total shifts the arrays (no re-sort), and looking up
+    the rank of a total is O(log n).
+    """
+
+    def __init__(self, totals):
+        self.sorted_totals = np.sort(np.asarray(totals, dtype=np.float64))
+        # Distinct totals and how often each occurs, for dense ranking
+        self.distinct, self.counts = np.unique(self.sorted_totals, return_counts=True)
+
+    def add(self, totals):
+        """Insert one total or an array of totals."""
+        totals = np.sort(np.atleast_1d(np.asarray(totals, dtype=np.float64)))
+        self.sorted_totals = np.insert(self.sorted_totals, np.searchsorted(self.sorted_totals, totals), totals)
+        values, counts = np.unique(totals, return_counts=True)
+        i = np.searchsorted(self.distinct, values)
+        known = i < len(self.distinct)
+        known[known] = self.distinct[i[known]] == values[known]
+        self.counts[i[known]] += counts[known]
+        self.distinct = np.insert(self.distinct, i[~known], values[~known])
+        self.counts = np.insert(self.counts, i[~known], counts[~known])
+
+    def remove(self, totals):
+        """Remove one total or an array of totals (each must be present)."""
+        totals = np.sort(np.atleast_1d(np.asarray(totals, dtype=np.float64)))
+        # Repeated values map to consecutive slots: first slot plus their offset within the group
+        offsets = np.arange(len(totals)) - np.searchsorted(totals, totals)
+        self.sorted_totals = np.delete(self.sorted_totals, np.searchsorted(self.sorted_totals, totals) + offsets)
+        values, counts = np.unique(totals, return_counts=True)
+        i = np.searchsorted(self.distinct, values)
+        self.counts[i] -= counts
+        emptied = i[self.counts[i] == 0]
+        self.distinct = np.delete(self.distinct, emptied)
+        self.counts = np.delete(self.counts, emptied)
+
+    def ranks(self, totals, rank_method='competition'):
+        """Rank each total against the class: 1 + number of (distinct, for dense) higher totals."""
+        totals = np.asarray(totals, dtype=np.float64)
+        if rank_method == 'dense':
+            return len(self.distinct) - np.searchsorted(self.distinct, totals, side='right') + 1
+        return len(self.sorted_totals) - np.searchsorted(self.sorted_totals, totals, side='right') + 1
+
+def histogram_counts(scores, bins=10, low=0, high=100):
+    """Count scores per subject into ``bins`` equal bins over [low, high] in one bincount.
+
+    ``scores`` is a 2-D (students x subjects) array and ``high`` may be one value
+    per subject; NaN is skipped and values outside the range land in the first/last
+    bin. Returns a (subjects x bins) array.
+    """
+    scores = np.asarray(scores, dtype=np.float64)
+    present = ~np.isnan(scores)
+    width = (high - low) / bins
+    bin_index = np.clip(np.floor((np.where(present, scores, low) - low) / width), 0, bins - 1).astype(np.int64)
+    # Offset each subject's bins so a single bincount fills the whole table
+    flat = (bin_index + np.arange(scores.shape[1]) * bins)[present]
+    return np.bincount(flat, minlength=scores.shape[1] * bins).reshape(scores.shape[1], bins)
+
+class ScoreSketch:
+    """Fine fixed-bin histograms of scores per subject.
+
+    Memory is bounded by subjects x bins no matter how many rows are folded in.
+    Every score is kept as the lower edge of its bin (plus one extra slot for
+    scores equal to ``high``), so scores on the bin grid (whole and half marks
+    with the default 200 bins over 0-100) are held exactly and others to within
+    one bin width.
+    """
+
+    def __init__(self, num_subjects, bins=200, low=0, high=100):
+        self.bins, self.low = bins, low
+        self.high = np.broadcast_to(np.asarray(high, dtype=float), (num_subjects,))
+        self.width = (self.high - low) / bins
+        self.points = np.zeros((num_subjects, bins + 1), dtype=np.int64)
+
+    def update(self, scores):
+        self.points += histogram_counts(scores, self.bins + 1, self.low, self.high + self.width)
+
+    @property
+    def counts(self):
+        """Scores per bin over [low, high], with ``high`` itself in the last bin."""
+        counts = self.points[:, :-1].copy()
+        counts[:, -1] += self.points[:, -1]
+        return counts
+
+    def quantiles(self, qs):
+        """Quantiles (qs in 0-1) interpolated between order statistics like np.nanpercentile.
+
+        Returns a (len(qs) x subjects) array.
+        """
+        cumulative = np.cumsum(self.points, axis=1)
+        total = cumulative[:, -1]
+        last = np.maximum(total - 1, 0)
+
+        def order_statistic(k):
+            # Value of each subject's k-th smallest score (0-based)
+            return self.low + (cumulative <= k[:, None]).sum(axis=1) * self.width
+
+        result = np.full((len(qs), len(self.points)), np.nan)
+        for i, q in enumerate(qs):
+            position = q * last
+            below = np.floor(position)
+            lower, upper = order_statistic(below), order_statistic(np.minimum(below + 1, last))
+            result[i] = np.where(total > 0, lower + (position - below) * (upper - lower), np.nan)
+        return result
+
+    def count_at_least(self, threshold):
+        """Number of scores per subject at or above ``threshold`` (exact for thresholds on the bin grid)."""
+        first = np.clip(np.ceil((threshold - self.low) / self.width), 0, self.bins + 1)
+        return np.where(np.arange(self.bins + 1) >= first[:, None], self.points, 0).sum(axis=1)
+
+    def histogram(self, bins=10):
+        """Coarsen to ``bins`` equal bins (``bins`` must divide the sketch's bin count)."""
+        return self.counts.reshape(len(self.points), bins, -1).sum(axis=2)
+
+def ranking_table(names, totals, max_total, rank_method='competition'):
+    """Build a Name/Total/Percentage/Rank table from per-student totals (in row order)."""
+    totals = np.asarray(totals, dtype=float)
+    ranking = pd.DataFrame({
+        'Name': np.asarray(names),
+        'Total': totals,
+        'Percentage': (totals / max_total * 100).round(2) if max_total else 0.0,
+    })
+    # Tied totals share a rank, so the result does not depend on row order
+    ranking['Rank'] = ranking['Total'].rank(
+        method=RANK_METHODS[rank_method], ascending=False
+    ).astype(int)
+    return ranking
+
+def whole_columns(scores):
+    """Per column, whether every score is a whole number and none is missing.
+
+    Such columns read as integers, so their scores are shown as ints (55, not 55.0).
+    """
+    if scores.dtype == np.uint8:
+        return np.ones(scores.shape[1], dtype=bool)
+    return ~np.isnan(scores).any(axis=0) & (scores % 1 == 0).all(axis=0)
+
+def _fits_uint8(scores):
+    """Whether every score is a whole number in 0-255 with nothing missing."""
+    return not np.isnan(scores).any() and bool(((scores >= 0) & (scores <= 255) & (scores == np.round(scores))).all())
+
+def compact_scores(frame):
+    """Coerce score columns once into a 2-D matrix of the smallest fitting dtype.
+
+    Whole scores in 0-255 with nothing missing become uint8; anything else stays
+    float64 (NaN for missing or invalid values), so decimal marks are exact.
+    Columns that already share one of those dtypes are not copied.
+    """
+    dtypes = set(frame.dtypes)
+    if len(dtypes) == 1 and dtypes <= {np.dtype(np.uint8), np.dtype(np.float64)}:
+        # Already compact (e.g. a frame from a previous analyzer): use the frame's own
+        # buffer, which may be column-major. The view is read-only, so incremental
+        # updates copy it before writing instead of changing the caller's frame.
+        scores = frame.to_numpy().view()
+        scores.flags.writeable = False
+        return scores
+    scores = frame.apply(pd.to_numeric, errors='coerce').to_numpy(dtype=np.float64)
+    if scores.size and _fits_uint8(scores):
+        scores = scores.astype(np.uint8)
+    return np.ascontiguousarray(scores)
+
+def normalize_scores(frame, key_columns=('Name',)):
+    """Return ``(data, scores)``: a compact copy of the gradebook and its score matrix.
+
+    Key columns are kept (Name as a categorical) and every other column is treated
+    as a subject. The subject columns of ``data`` share memory with ``scores``.
+    """
+    subjects = [col for col in frame.columns if col not in key_columns]
+    scores = compact_scores(frame[subjects])
+    keys = [(col, frame[col].to_numpy()) for col in frame.columns if col in key_columns]
+    return scores_frame(scores, subjects, keys), scores
+
+def scores_frame(scores, subjects, keys):
+    """Wrap a score matrix (without copying) and ``(column, values)`` key pairs in a DataFrame."""
+    data = pd.DataFrame(scores, columns=subjects, copy=False)
+    for i, (col, values) in enumerate(keys):
+        data.insert(i, col, pd.Categorical(values) if col == 'Name' else values)
+    return data
+
+def _extended_stats(median, q1, q3, std, pass_rate, histogram):
+    return {
+        'Median': round(float(median), 1),
+        'Q1': round(float(q1), 1),
+        'Q3': round(float(q3), 1),
+        'Std': round(float(std), 1),
+        'Pass Rate': round(float(pass_rate), 1),
+        'Histogram': histogram.tolist(),
+    }
+
+def _score_value(value, whole=True):
+    """Convert a stored score to a plain Python number (whole scores as int if ``whole``)."""
+    value = float(value)
+    return int(value) if whole and value.is_integer() else round(value, 2)
+
+class ChartRenderer:
+    """Draws student score bar charts on one reusable figure.
+
+    The figure, axes, threshold line and labels are set up once; each render only
+    updates bar heights, colors and the title before saving. ``max_marks`` is as
+    for StudentAnalyzer; colors and the pass line are relative to each maximum.
+    """
+
+    def __init__(self, subjects, pass_threshold, max_marks=100):
+        # matplotlib is imported on first use, so analytics-only callers never load it.
+        # The Agg canvas renders off-screen; no GUI backend is ever initialized.
+        from matplotlib.backends.backend_agg import FigureCanvasAgg
+        from matplotlib.figure import Figure
+
+        self.figure = Figure(figsize=(10, 6))
+        FigureCanvasAgg(self.figure)
+        ax = self.figure.add_subplot()
+        self.bars = ax.bar(subjects, np.zeros(len(subjects)))
+        self.maxima = subject_max_marks(subjects, max_marks)
+        marks = pass_marks(pass_threshold, self.maxima)
+        
+        # Add pass threshold line (one segment per bar if the subjects' maxima differ)
+        if len(np.unique(marks)) > 1:
+            ax.hlines(marks, [bar.get_x() for bar in self.bars],
+                      [bar.get_x() + bar.get_width() for bar in self.bars],
+                      color='r', linestyle='--', label=f'Pass Threshold')
+        else:
+            ax.axhline(y=marks[0] if len(marks) else pass_threshold, color='r', linestyle='--',
+                       label=f'Pass Threshold')
+        
+        self.title = ax.set_title('')
+        ax.set_xlabel('Subjects')
+        ax.set_ylabel('Scores')
+        ax.set_ylim(0, self.maxima.max() if len(self.maxima) else 100)
+        ax.legend()
+
+    def render(self, student_name, scores, output):
+        """Draw one student's scores and save the chart to ``output`` (path or file-like)."""
+        # Color bars based on scores (as a percentage of the subject's maximum)
+        for bar, score, maximum in zip(self.bars, scores, self.maxima):
+            bar.set_height(score)
+            if score >= 80 * maximum / 100:
+                bar.set_color('green')
+            elif score >= 65 * maximum / 100:
+                bar.set_color('yellow')
+            else:
+                bar.set_color('red')
+        
+        self.title.set_text(f"{student_name}'s Performance")
+        self.figure.savefig(output)
+
+def _render_charts(subjects, pass_threshold, batch, output_dir, max_marks=100):
+    """Render a batch of (student name, scores) charts with one figure; returns the paths."""
+    renderer = ChartRenderer(subjects, pass_threshold, max_marks)
+    paths = []
+    for student_name, scores in batch:
+        path = os.path.join(output_dir, f"{student_name}_scores.png")
+        renderer.render(student_name, scores, path)
+        paths.append(path)
+    return paths
+
+def format_report(student_name, analysis, recommendations, pass_threshold, max_marks=100):
+    """Render the text report for one student from its analysis and recommendations.
+
+    A subject passes at ``pass_threshold`` percent of its maximum (see subject_max_marks).
+    """
+    marks = pass_marks(pass_threshold, subject_max_marks(list(analysis['Scores']), max_marks))
+    report = [
+        f"STUDENT REPORT: {student_name}",
+        f"==========================",
+        f"",
+        f"Rank: {analysis['Rank']}",
+        f"Average Score: {analysis['Average']}",
+        f"Percentage:{analysis['Percentage']}",
+        f"Grade:{analysis['Grade']}",
+        f"",
+        f"SCORES:",
+    ]
+    
+    # Add each subject score
+    for (subject, score), mark in zip(analysis['Scores'].items(), marks):
+        status = "PASS" if score >= mark else "FAIL"
+        report.append(f"{subject}: {score} ({status})")
+    
+    report.extend([
+        f"",
+        f"Best Subject: {analysis['Best Subject']}",
+        f"Worst Subject: {analysis['Worst Subject']}",
+        f"Percentage:{analysis['Percentage']}",
+        f"Grade:{analysis['Grade']}"
+        f"",
+        f"RECOMMENDATIONS:"
+    ])
+    
+    # Add recommendations
+    for i, rec in enumerate(recommendations, 1):
+        report.append(f"{i}. {rec}")
+    return '\n'.join(report)
+
+def read_gradebook(source, file_extension):
+    """Parse a CSV or Excel gradebook from a path or file-like object."""
+    if file_extension == '.csv':
+        return pd.read_csv(source)
+    elif file_extension in ['.xlsx', '.xls']:
+        return pd.read_excel(source)
+    else:
+        raise ValueError("Unsupported file format. Please use CSV or Excel file.")
+
+def expand_sources(sources):
+    """Turn a path, a glob pattern or a list of them into a list of file paths."""
+    if isinstance(sources, (str, os.PathLike)):
+        sources = [sources]
+    paths = []
+    for source in sources:
+        matches = sorted(glob.glob(os.fspath(source)))
+        paths.extend(matches or [os.fspath(source)])
+    return paths
+
+def _load_gradebook_file(path, key_columns):
+    """Read and normalize one gradebook file (runs in a worker process)."""
+    frame = read_gradebook(path, os.path.splitext(path)[1].lower())
+    return normalize_scores(frame, key_columns)[0]
+
+def _drop_duplicate_keys(frame, key_column, path):
+    """Keep the first row of each key within one file, as the StudentAnalyzer index does.
+
+    Duplicate IDs (key_column other than Name) are an error. Returns
+    ``(frame, duplicate keys)`` so the caller can warn about duplicate names.
+    """
+    duplicated = frame[key_column].duplicated().to_numpy()
+    if not duplicated.any():
+        return frame, []
+    duplicates = frame.loc[duplicated, key_column].unique().tolist()
+    if key_column != 'Name':
+        raise ValueError(f"Duplicate values in '{key_column}' in {path}: {', '.join(map(str, duplicates))}")
+    return frame[~duplicated], duplicates
+
+def _warn_duplicate_names(path, duplicates):
+    if duplicates:
+        warnings.warn(
+            f"Duplicate student names in {path}: {', '.join(map(str, duplicates))}. "
+            "Only the first row of each is used; pass key_column to tell them apart."
+        )
+
+def merge_gradebooks(frames, key_column='Name', aggregate='last'):
+    """Merge gradebooks on ``key_column``, aligning subjects by column name.
+
+    Students found in several files are combined into one row; when more than
+    one file has a score for the same subject, ``aggregate`` ('last', 'first',
+    'mean', 'max', ...) decides which value is kept.
+    """
+    combined = pd.concat(frames, ignore_index=True, sort=False)
+    combined['Name'] = combined['Name'].astype(object)
+    other_keys = [col for col in ('Name',) if col != key_column and col in combined]
+    reductions = {col: ('first' if col in other_keys else aggregate) for col in combined.columns if col != key_column}
+    merged = combined.groupby(key_column, sort=False).agg(reductions).reset_index()
+    return merged[[key_column] + other_keys + [col for col in merged.columns if col not in other_keys and col != key_column]]
+
+def load_gradebooks(sources, key_column='Name', workers=None, aggregate='last'):
+    """Read several CSV/Excel gradebooks (a list or glob) and merge them into one DataFrame.
+
+    With ``workers`` > 1 the files are parsed in a process pool.
+    """
+    paths = expand_sources(sources)
+    key_columns = tuple(dict.fromkeys(('Name', key_column)))
+    if not workers or workers == 1:
+        frames = [_load_gradebook_file(path, key_columns) for path in paths]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            frames = list(pool.map(_load_gradebook_file, paths, [key_columns] * len(paths)))
+    # Rows sharing a key within one file are different students, not parts of one record
+    for i, path in enumerate(paths):
+        frames[i], duplicates = _drop_duplicate_keys(frames[i], key_column, path)
+        _warn_duplicate_names(path, duplicates)
+    return merge_gradebooks(frames, key_column, aggregate)
+
+def _partition_gradebook_file(path, key_column, spill_dir, partitions, file_number):
+    """Split one gradebook by hash of its key into partition files.
+
+    Returns its subjects and the duplicate names dropped from it.
+    """
+    key_columns = tuple(dict.fromkeys(('Name', key_column)))
+    frame, duplicates = _drop_duplicate_keys(_load_gradebook_file(path, key_columns), key_column, path)
+    parts = pd.util.hash_pandas_object(frame[key_column].astype(object), index=False).to_numpy() % partitions
+    for part in np.unique(parts):
+        frame[parts == part].to_pickle(os.path.join(spill_dir, f"part-{part}-{file_number}.pkl"))
+    return [col for col in frame.columns if col not in key_columns], duplicates
 
 class StudentAnalyzer:
-    """A simplified class to analyze student performance data."""
+    """A simplified class to analyze student performance data.
+
+    The read methods (analyses, stats, rankings, recommendations, charts) have no
+    side effects beyond internal caches and may be called from several threads at
+    once; upsert_students/remove_students must not run concurrently with them.
+    """
     
-    def __init__(self, file_path):
-        """Initialize with the path to the student data file."""
+    def __init__(self, file_path=None, rank_method='competition', id_column=None, cache_size=256,
+                 cache_dir=None, data=None, file_extension=None, grading=None, max_marks=100,
+                 rules=None):
+        """Initialize with the path to the student data file.
+
+        ``file_path`` may also be raw file bytes or a file-like object, in which
+        case ``file_extension`` says how to parse it. Pass ``data`` instead to use
+        an in-memory DataFrame (see from_dataframe and from_buffer).
+
+        If ``id_column`` is given, students are looked up by that column instead of
+        by Name, which allows several students to share a name. ``cache_size`` bounds
+        how many per-student results are memoized. With ``cache_dir``, parsed files
+        are kept in a GradebookCache there and reloaded without parsing.
+
+        ``grading`` is a GradingScheme (DEFAULT_GRADING if omitted) and ``max_marks``
+        the maximum score of every subject, or a {subject: marks} dict. ``rules`` is
+        the list of RecommendationRule objects (DEFAULT_RULES if omitted).
+        """
         self.file_path = file_path
-        self.load_data()
-        self.subjects = [col for col in self.data.columns if col != 'Name']
+        self.file_extension = file_extension
+        self.id_column = id_column
+        self.cache_dir = cache_dir
+        self.cache_size = cache_size
+        # Guards the lazily built indexes, the caches and the chart renderer
+        self._lock = threading.RLock()
+        self._version = 0
+        self._cache = OrderedDict()
+        self._chart_cache = OrderedDict()
+        self._renderer = None
+        self._rank_index = None
+        self._stats = None
+        self._scores = None
+        self._whole = None
+        self.rank_method = rank_method
+        self.grading = grading or DEFAULT_GRADING
+        self.max_marks = max_marks
+        self.rules = rules or DEFAULT_RULES
+        if data is None:
+            self.load_data()
+        else:
+            self.data = data
+        self.subjects = [col for col in self.data.columns if col not in self._key_columns()]
         
-        self.pass_threshold = 50  # Default passing score
+        self.pass_threshold = 50  # Default passing score (percent of each subject's maximum)
+
+    @classmethod
+    def from_dataframe(cls, data, **kwargs):
+        """Create an analyzer from a DataFrame already in memory (no temp file).
+
+        If every subject column is already uint8, or every one float64, the scores
+        are used in place without a copy; otherwise they are converted once (see
+        compact_scores). Only the key columns are always copied.
+        """
+        return cls(data=data, **kwargs)
+
+    @classmethod
+    def from_buffer(cls, buffer, file_extension, **kwargs):
+        """Create an analyzer from CSV/Excel bytes or a file-like object, e.g. an upload."""
+        return cls(buffer, file_extension=file_extension, **kwargs)
+
+    @classmethod
+    @instrumented(rows=lambda cls, result: len(result.data))
+    def from_files(cls, sources, key_column='Name', workers=None, aggregate='last', **kwargs):
+        """Create an analyzer over several gradebooks (list or glob), e.g. all sections of a term.
+
+        See load_gradebooks; with a key_column other than Name it becomes the id_column.
+        """
+        data = load_gradebooks(sources, key_column, workers, aggregate)
+        if key_column != 'Name':
+            kwargs.setdefault('id_column', key_column)
+        return cls.from_dataframe(data, **kwargs)
+
+    @property
+    def data(self):
+        return self._data
+
+    @data.setter
+    def data(self, value):
+        self._set_normalized(*normalize_scores(value, self._key_columns()))
+
+    def _key_columns(self):
+        return ('Name', self.id_column) if self.id_column else ('Name',)
+
+    def _set_normalized(self, data, scores):
+        """Install an already normalized gradebook and its score matrix."""
+        with self._lock:
+            self.invalidate()
+            key_columns = self._key_columns()
+            self._data, self._scores = data, scores
+            self._scores_key = tuple(col for col in data.columns if col not in key_columns)
+            self._build_index()
+
+    @property
+    def subjects(self):
+        return self._subjects
+
+    @subjects.setter
+    def subjects(self, value):
+        self._subjects = list(value)
+        self._reset_derived()
+
+    @property
+    def pass_threshold(self):
+        return self._pass_threshold
+
+    @pass_threshold.setter
+    def pass_threshold(self, value):
+        self._pass_threshold = value
+        self.clear_cache()
+
+    @property
+    def grading(self):
+        return self._grading
+
+    @grading.setter
+    def grading(self, value):
+        self._grading = value
+        self.clear_cache()
+
+    @property
+    def rules(self):
+        return self._rules
+
+    @rules.setter
+    def rules(self, value):
+        self._rules = list(value)
+        self.clear_cache()
+
+    @property
+    def max_marks(self):
+        return self._max_marks
+
+    @max_marks.setter
+    def max_marks(self, value):
+        self._max_marks = value
+        self.clear_cache()
+
+    @property
+    def rank_method(self):
+        return self._rank_method
+
+    @rank_method.setter
+    def rank_method(self, value):
+        if value not in RANK_METHODS:
+            raise ValueError(f"Unsupported rank method '{value}'. Use one of: {', '.join(RANK_METHODS)}")
+        self._rank_method = value
+        self.clear_cache()
+
+    def invalidate(self):
+        """Drop derived indexes so they are rebuilt from the current data.
+
+        Call this after modifying ``self.data`` in place.
+        """
+        with self._lock:
+            self._scores = None
+            self._reset_derived()
+
+    def _reset_derived(self):
+        with self._lock:
+            self._rank_index = None
+            self._stats = None
+            self._whole = None
+            self.clear_cache()
+
+    def clear_cache(self):
+        """Start a new data version and forget all memoized per-student results."""
+        with self._lock:
+            self._version += 1
+            self._cache.clear()
+
+    def clear_chart_cache(self):
+        """Forget all rendered chart images (see get_chart_png)."""
+        with self._lock:
+            self._chart_cache.clear()
+
+    def _cached(self, kind, student_name, compute):
+        """Return the memoized result for (kind, student, data version), computing it on a miss."""
+        with self._lock:
+            key = (kind, student_name, self._version)
+            hit = key in self._cache
+            if hit:
+                self._cache.move_to_end(key)
+                result = self._cache[key]
+        if not hit:
+            # Computed outside the lock so concurrent lookups of other students are not serialized
+            result = compute(student_name)
+            with self._lock:
+                # Data changed meanwhile: the result is stale, so hand it out but do not keep it
+                if self._version == key[2]:
+                    self._cache[key] = result
+                    if len(self._cache) > self.cache_size:
+                        self._cache.popitem(last=False)
+        # Hand out a copy so callers cannot alter the cached result
+        return copy.deepcopy(result)
+
+    def _build_index(self):
+        """Map each student key (Name, or id_column if set) to its row position."""
+        key_column = self.id_column or 'Name'
+        keys = self.data[key_column]
+        duplicates = keys[keys.duplicated()].unique().tolist()
+        if duplicates:
+            if self.id_column:
+                raise ValueError(f"Duplicate values in '{key_column}': {', '.join(map(str, duplicates))}")
+            warnings.warn(
+                f"Duplicate student names: {', '.join(map(str, duplicates))}. "
+                "Only the first row of each is used; pass id_column to tell them apart."
+            )
+        # Keep the first occurrence of a duplicate, in file order
+        first = ~keys.duplicated().to_numpy()
+        self._index = dict(zip(keys[first].tolist(), np.flatnonzero(first).tolist()))
+
+    def _position(self, student_name):
+        """Return the row position of a student, or None if unknown."""
+        return self._index.get(student_name)
+
+    def _get_rank_index(self):
+        """Return the class-wide rank index, building it (and the per-row totals) on first use.
+
+        ``self._totals`` is aligned with the positions of ``self.data``.
+        """
+        with self._lock:
+            if self._rank_index is None:
+                self._totals = np.nansum(self._score_matrix(), axis=1, dtype=np.float64)
+                self._rank_index = RankIndex(self._totals)
+            return self._rank_index
+
+    def _pass_marks(self):
+        """Per-subject pass marks in score units for the current subjects."""
+        return pass_marks(self.pass_threshold, subject_max_marks(self.subjects, self.max_marks))
+
+    def _percentages(self, totals):
+        """Convert totals into percentages of the maximum possible total."""
+        max_total = subject_max_marks(self.subjects, self.max_marks).sum()
+        if not max_total:
+            return np.zeros(len(totals))
+        return (np.asarray(totals, dtype=float) / max_total * 100).round(2)
+
+    @instrumented(rows=lambda self, result: len(result))
+    def regrade(self, grading=None):
+        """Grade every student under a grading scheme (default: the current one) in one pass."""
+        self._get_rank_index()
+        grades = (grading or self.grading).grade(self._percentages(self._totals))
+        return pd.Series(grades, index=self.data[self.id_column or 'Name'].to_numpy(), name='Grade')
+
+    def _fold_stats(self, rows, sign=1):
+        """Add (sign=1) or subtract (sign=-1) score rows from the running per-subject stats."""
+        if self._stats is None or not len(rows):
+            return
+        stats = self._stats
+        present = ~np.isnan(rows)
+        stats['count'] += sign * present.sum(axis=0)
+        stats['sum'] += sign * np.where(present, rows, 0).sum(axis=0)
+        if sign > 0:
+            stats['min'] = np.fmin(stats['min'], np.fmin.reduce(rows, axis=0))
+            stats['max'] = np.fmax(stats['max'], np.fmax.reduce(rows, axis=0))
+        else:
+            # Losing the current extreme means that column has to be rescanned
+            stats['dirty'] |= (rows == stats['min']).any(axis=0) | (rows == stats['max']).any(axis=0)
+
+    def _get_stats(self):
+        """Return running per-subject count/sum/min/max, building them on first use.
+
+        Columns flagged in ``dirty`` lost their min or max and are rescanned lazily.
+        """
+        with self._lock:
+            if self._stats is None:
+                scores = self._score_matrix()
+                present = ~np.isnan(scores)
+                self._stats = {
+                    'count': present.sum(axis=0),
+                    'sum': np.where(present, scores, 0).sum(axis=0, dtype=np.float64),
+                    'min': np.full(len(self.subjects), np.nan),
+                    'max': np.full(len(self.subjects), np.nan),
+                    'dirty': np.ones(len(self.subjects), dtype=bool),
+                }
+            stats = self._stats
+            if stats['dirty'].any():
+                scores = self._score_matrix()[:, stats['dirty']]
+                if len(scores):
+                    stats['min'][stats['dirty']] = np.fmin.reduce(scores, axis=0)
+                    stats['max'][stats['dirty']] = np.fmax.reduce(scores, axis=0)
+                else:
+                    stats['min'][stats['dirty']] = stats['max'][stats['dirty']] = np.nan
+                stats['dirty'][:] = False
+            return stats
+
+    def _whole_subjects(self):
+        """Return whole_columns of the score matrix, computing it on first use."""
+        with self._lock:
+            if self._whole is None:
+                self._whole = whole_columns(self._score_matrix())
+            return self._whole
+
+    def _score_matrix(self):
+        """Return the shared compact score matrix for the current subjects (see compact_scores)."""
+        with self._lock:
+            key = tuple(self.subjects)
+            if self._scores is None or self._scores_key != key:
+                self._scores = compact_scores(self.data[self.subjects])
+                self._scores_key = key
+            return self._scores
+
+    @instrumented()
+    def upsert_students(self, rows):
+        """Add new students or update scores of existing ones without reloading.
+
+        ``rows`` is a DataFrame or a list of dicts holding the student key (Name, or
+        id_column) and any subset of the subjects. Missing/NaN scores leave an
+        existing student's score unchanged; if a key appears twice the last row wins.
+        Class statistics and the rank index are updated incrementally.
+        """
+        with self._lock:
+            updates = pd.DataFrame(rows)
+            key_column = self.id_column or 'Name'
+            self._check_incremental(updates)
+            updates = updates.drop_duplicates(key_column, keep='last')
+            subjects = [col for col in updates.columns if col in self.subjects]
+            columns = [self.subjects.index(col) for col in subjects]
+            values = updates[subjects].apply(pd.to_numeric, errors='coerce').to_numpy(dtype=np.float64)
+
+            keys = updates[key_column].tolist()
+            positions = np.array([self._position(key) for key in keys], dtype=object)
+            known = np.array([position is not None for position in positions], dtype=bool)
+            known_positions = positions[known].astype(int)
+
+            # Final score rows: updated existing students and brand new ones
+            scores = self._score_matrix()
+            old_rows = scores[known_positions].astype(np.float64)
+            new_rows = old_rows.copy()
+            new_rows[:, columns] = np.where(np.isnan(values[known]), old_rows[:, columns], values[known])
+            added_rows = np.full((int((~known).sum()), len(self.subjects)), np.nan)
+            added_rows[:, columns] = values[~known]
+
+            # Widen the matrix if the new scores no longer fit (and copy it if it is read-only)
+            rebuild = bool(len(added_rows))
+            if scores.dtype == np.uint8 and not _fits_uint8(np.concatenate([new_rows, added_rows])):
+                scores = scores.astype(np.float64)
+                rebuild = True
+            elif not scores.flags.writeable:
+                scores = np.array(scores)
+                rebuild = True
+
+            scores[known_positions] = new_rows
+            # Fold in the values as stored in the matrix's dtype, so the stats and
+            # totals match what a rebuild from the matrix would give
+            new_rows = scores[known_positions].astype(np.float64)
+            added_rows = added_rows.astype(scores.dtype).astype(np.float64)
+            self._fold_stats(old_rows, -1)
+            self._fold_stats(new_rows)
+            new_totals = np.nansum(new_rows, axis=1, dtype=np.float64)
+            added_totals = np.nansum(added_rows, axis=1, dtype=np.float64)
+            if self._rank_index is not None:
+                self._rank_index.remove(self._totals[known_positions])
+                self._totals[known_positions] = new_totals
+                self._rank_index.add(np.concatenate([new_totals, added_totals]))
+                self._totals = np.concatenate([self._totals, added_totals])
+
+            if rebuild:
+                scores = np.ascontiguousarray(np.concatenate([scores, added_rows.astype(scores.dtype)]))
+                key_values = []
+                for col in self._key_columns():
+                    added = updates.loc[~known, col].to_numpy() if col in updates else np.full(len(added_rows), None)
+                    key_values.append((col, np.concatenate([self.data[col].to_numpy(), added])))
+                self._fold_stats(added_rows)
+                start = len(self.data)
+                self._data = scores_frame(scores, self.subjects, key_values)
+                self._scores, self._scores_key = scores, tuple(self.subjects)
+                for offset, key in enumerate(updates.loc[~known, key_column].tolist()):
+                    self._index[key] = start + offset
+            self._whole = None
+            self.clear_cache()
+
+    @instrumented()
+    def remove_students(self, names):
+        """Remove students (by Name, or id_column) without reloading the file."""
+        with self._lock:
+            names = list(names)
+            positions = [self._position(name) for name in names]
+            missing = [name for name, position in zip(names, positions) if position is None]
+            if missing:
+                raise ValueError(f"Students not found: {', '.join(map(str, missing))}")
+            self._check_incremental()
+            # Dropping a first occurrence would expose a duplicate name, so drop every row with that key
+            key_values = self.data[self.id_column or 'Name']
+            keep = ~key_values.isin(names).to_numpy()
+
+            scores = self._score_matrix()
+            removed_rows = scores[~keep].astype(np.float64)
+            self._fold_stats(removed_rows, -1)
+            if self._rank_index is not None:
+                self._rank_index.remove(self._totals[~keep])
+                self._totals = self._totals[keep]
+
+            scores = np.ascontiguousarray(scores[keep])
+            key_values = [(col, self.data[col].to_numpy()[keep]) for col in self._key_columns()]
+            self._data = scores_frame(scores, self.subjects, key_values)
+            self._scores, self._scores_key = scores, tuple(self.subjects)
+            self._build_index()
+            self._whole = None
+            self.clear_cache()
+
+    def _check_incremental(self, updates=None):
+        """Make sure an incremental update can be applied to the current data."""
+        subject_columns = [col for col in self.data.columns if col not in self._key_columns()]
+        if subject_columns != self.subjects:
+            raise ValueError("Incremental updates need every subject column selected in 'subjects'.")
+        if updates is not None:
+            key_column = self.id_column or 'Name'
+            if key_column not in updates:
+                raise ValueError(f"Updates must include the '{key_column}' column.")
+            unknown = [col for col in updates.columns if col not in self.data.columns]
+            if unknown:
+                raise ValueError(f"Unknown subjects: {', '.join(map(str, unknown))}")
+
+    @instrumented(rows=lambda self, result: len(result))
+    def get_rankings(self):
+        """Get the class ranking table ordered by rank (ties keep file order)."""
+        rank_index = self._get_rank_index()
+        ranking = pd.DataFrame({
+            'Name': self.data['Name'].to_numpy(),
+            'Total': self._totals,
+            'Percentage': self._percentages(self._totals),
+            'Rank': rank_index.ranks(self._totals, self.rank_method),
+        })
+        if self.id_column:
+            ranking.insert(0, self.id_column, self.data[self.id_column].to_numpy())
+        return ranking.sort_values('Rank', kind='stable').reset_index(drop=True)
         
+    @instrumented(rows=lambda self, result: len(self.data))
     def load_data(self):
         """Load data from CSV or Excel file."""
-        file_extension = os.path.splitext(self.file_path)[1].lower()
+        source = self.file_path
+        if hasattr(source, 'read'):
+            source = source.read()
+        if isinstance(source, (bytes, bytearray, memoryview)):
+            file_extension = self.file_extension.lower()
+            reader_source = BytesIO(source)
+        else:
+            file_extension = (self.file_extension or os.path.splitext(source)[1]).lower()
+            reader_source = source
         
-        if file_extension == '.csv':
-            self.data = pd.read_csv(self.file_path)
-        elif file_extension in ['.xlsx', '.xls']:
-            self.data = pd.read_excel(self.file_path)
+        if self.cache_dir is None:
+            self.data = read_gradebook(reader_source, file_extension)
         else:
-            raise ValueError("Unsupported file format. Please use CSV or Excel file.")
+            cache = GradebookCache(self.cache_dir)
+            digest = content_hash(source)
+            cached = cache.load(digest, self._key_columns())
+            if cached is None:
+                self.data = read_gradebook(reader_source, file_extension)
+                cache.store(digest, self.data, self._scores, self._key_columns())
+            else:
+                self._set_normalized(*cached)
             
-        print(f"Data loaded: {len(self.data)} students, {len(self.data.columns)-1} subjects")
+        logger.info("Data loaded: %d students, %d subjects", len(self.data), len(self.data.columns) - 1)
     
-    def get_class_stats(self):
+    @instrumented(rows=lambda self, result: len(self.data))
+    def get_class_stats(self, extended=False):
+        """Get Average/Highest/Lowest per subject.
+
+        With ``extended``, also Median, Q1, Q3, Std, Pass Rate (% of students at or
+        above pass_threshold percent of the subject's maximum) and a 10-bin
+        Histogram, computed column-wise over the whole score matrix at once.
+        """
+        # Running aggregates over the score matrix, kept up to date by upsert/remove
+        aggregates = self._get_stats()
+        with np.errstate(invalid='ignore', divide='ignore'):
+            averages = aggregates['sum'] / aggregates['count']
+        highest, lowest = aggregates['max'], aggregates['min']
+
+        whole = self._whole_subjects()
         stats = {}
-        for subject in self.data.columns[1:]:
-        # Convert values to numeric, coerce errors to NaN, then drop NaNs
-            numeric_values = pd.to_numeric(self.data[subject], errors='coerce')
+        for i, subject in enumerate(self.subjects):
             stats[subject] = {
-            'Average': round(numeric_values.mean(), 1),
-            'Highest': numeric_values.max(),
-            'Lowest': numeric_values.min()
+            'Average': round(float(averages[i]), 1),
+            'Highest': _score_value(highest[i], whole[i]),
+            'Lowest': _score_value(lowest[i], whole[i])
             }
+
+        if extended and len(self.data):
+            scores = self._score_matrix()
+            with warnings.catch_warnings():
+                # All-missing subjects just come out as NaN
+                warnings.simplefilter('ignore', RuntimeWarning)
+                q1, median, q3 = np.nanpercentile(scores, [25, 50, 75], axis=0)
+                std = np.nanstd(scores, axis=0, dtype=np.float64)
+            with np.errstate(invalid='ignore', divide='ignore'):
+                pass_rates = (scores >= self._pass_marks()).sum(axis=0) / aggregates['count'] * 100
+            histograms = histogram_counts(scores, high=subject_max_marks(self.subjects, self.max_marks))
+            for i, subject in enumerate(self.subjects):
+                stats[subject].update(_extended_stats(
+                    median[i], q1[i], q3[i], std[i], pass_rates[i], histograms[i]
+                ))
         return stats
     
+    @instrumented(rows=1)
     def analyze_student(self, student_name):
         """Get basic analysis for a specific student."""
-        if student_name not in self.data['Name'].values:
+        return self._cached('analysis', student_name, self._analyze_student)
+
+    def _analyze_student(self, student_name):
+        position = self._position(student_name)
+        if position is None:
             return f"Student '{student_name}' not found."
         
-        student_data = self.data[self.data['Name'] == student_name].iloc[0]
-        
-        # Get scores for each subject
-        scores = {subject: student_data[subject] for subject in self.subjects}
-        
-        # Find best and worst subjects
-        best_subject = max(scores.items(), key=lambda x: x[1])
-        worst_subject = min(scores.items(), key=lambda x: x[1])
-        
-        # Calculate average score
-        average_score = sum(scores.values()) / len(scores)
-        
-        # Calculate student's rank in class
-        self.data['Total'] = self.data[self.subjects].sum(axis=1)
-        
-        # Total marks of that student
-        total_score = sum(scores.values())
-        percentage = round((total_score / (len(self.subjects) * 100)) * 100, 2)
-        
-        if percentage > 90:
-            Grade='O'
-        elif percentage <90 and percentage >80:
-            Grade='E'
-        elif percentage <80 and percentage >70:
-            Grade='A'
-        else:
-            Grade='F'
-        
-        #percentage=(self.data['Total']*100/len(self.subjects))
-        sorted_data = self.data.sort_values('Total', ascending=False).reset_index(drop=True)
-        rank = sorted_data[sorted_data['Name'] == student_name].index[0] + 1
-        
-        return {
-            'Name': student_name,
-            'Scores': scores,
-            'Best Subject': f"{best_subject[0]} ({best_subject[1]})",
-            'Worst Subject': f"{worst_subject[0]} ({worst_subject[1]})",
-            'Average': round(average_score, 1),
-            'Percentage':percentage,
-            'Grade':Grade,
-            'Rank': f"{rank} out of {len(self.data)}"
-        }
+        return self._analysis_records([position])[0]
+
+    def _analysis_records(self, positions, frame=None):
+        """Build analyze_student-style dicts for the rows at positions from one vectorized pass."""
+        if frame is None:
+            frame = self._analysis_frame(np.asarray(positions, dtype=int))
+        scores = self._score_matrix()[positions]
+        whole = self._whole_subjects()
+        whole_by_subject = dict(zip(self.subjects, whole))
+        class_size = len(self.data)
+        records = []
+        for name, best, best_score, worst, worst_score, average, percentage, grade, rank, row in zip(
+            frame['Name'], frame['Best Subject'], frame['Best Score'], frame['Worst Subject'],
+            frame['Worst Score'], frame['Average'], frame['Percentage'], frame['Grade'], frame['Rank'],
+            scores,
+        ):
+            records.append({
+                'Name': name,
+                'Scores': {subject: _score_value(score, w) for subject, score, w in zip(self.subjects, row, whole)},
+                'Best Subject': f"{best} ({_score_value(best_score, whole_by_subject[best])})",
+                'Worst Subject': f"{worst} ({_score_value(worst_score, whole_by_subject[worst])})",
+                'Average': float(average),
+                'Percentage': float(percentage),
+                'Grade': str(grade),
+                'Rank': f"{rank} out of {class_size}"
+            })
+        return records
     
+    @instrumented(rows=lambda self, result: len(result))
+    def analyze_all(self):
+        """Get the analysis of every student as one DataFrame (one row per student)."""
+        return self._analysis_frame(np.arange(len(self.data)))
+
+    @instrumented(rows=lambda self, result: len(result))
+    def analyze_many(self, names):
+        """Get the analysis of the given students as one DataFrame, in the order given."""
+        names = list(names)
+        positions = [self._position(name) for name in names]
+        missing = [name for name, position in zip(names, positions) if position is None]
+        if missing:
+            raise ValueError(f"Students not found: {', '.join(map(str, missing))}")
+        return self._analysis_frame(np.array(positions, dtype=int))
+
+    def _analysis_frame(self, positions):
+        """Compute best/worst subject, average, percentage, grade and rank for rows at positions."""
+        return pd.DataFrame(self._analysis_columns(positions))
+
+    def _analysis_columns(self, positions):
+        """The _analysis_frame columns as a dict of arrays (building the DataFrame is left to callers)."""
+        scores = self._score_matrix()[positions].astype(float)
+        subjects = np.array(self.subjects, dtype=object)
+        rows = np.arange(len(positions))
+        missing = np.isnan(scores)
+        # Compare subjects relative to their maximum marks
+        relative = scores / subject_max_marks(self.subjects, self.max_marks)
+        best = np.where(missing, -np.inf, relative).argmax(axis=1)
+        worst = np.where(missing, np.inf, relative).argmin(axis=1)
+
+        rank_index = self._get_rank_index()
+        totals = self._totals[positions]
+        percentages = self._percentages(totals)
+        columns = {}
+        if self.id_column:
+            columns[self.id_column] = np.asarray(self.data[self.id_column].array[positions])
+        columns.update({
+            # Index the (categorical) column before converting, so one row costs O(1)
+            'Name': np.asarray(self.data['Name'].array[positions], dtype=object),
+            'Best Subject': subjects[best],
+            'Best Score': scores[rows, best],
+            'Worst Subject': subjects[worst],
+            'Worst Score': scores[rows, worst],
+            'Average': scores.mean(axis=1).round(1),
+            'Total': totals,
+            'Percentage': percentages,
+            'Grade': self.grading.grade(percentages),
+            'Rank': rank_index.ranks(totals, self.rank_method),
+        })
+        return columns
+
+    @instrumented(rows=1)
     def get_recommendations(self, student_name):
         """Get  recommendations for a student."""
-        analysis = self.analyze_student(student_name)
-        if isinstance(analysis, str):  # Error message
-            return analysis
-            
-        recommendations = []
-        
-        # Check for failing subjects
-        failing_subjects = []
-        for subject, score in analysis['Scores'].items():
-            if score < self.pass_threshold:
-                failing_subjects.append(subject)
-                
-        if failing_subjects:
-            recommendations.append(f"Focus on improving {', '.join(failing_subjects)}")
-        
-        # Add general recommendation based on average
-        if analysis['Average'] >= 80 or analysis['Percentage']>90:
-            recommendations.append(f"Great work! Keep it up! Percentage-{analysis['Percentage']} ")
-        elif analysis['Average'] >= 65 or analysis['Percentage']>80:
-            recommendations.append(f"Good progress. Try to improve your weaker subjects {analysis['Worst Subject']}. Percentage -{analysis['Percentage']} and average-{analysis['Average']}")
+        return self._cached('recommendations', student_name, self._get_recommendations)
+
+    def _get_recommendations(self, student_name):
+        position = self._position(student_name)
+        if position is None:
+            return f"Student '{student_name}' not found."
+        return self._recommendations([position])[0]
+
+    @instrumented(rows=lambda self, result: len(result))
+    def recommend_all(self, names=None):
+        """Evaluate the recommendation rules for every student (or just ``names``) in one pass.
+
+        Returns a Series of recommendation lists indexed by student.
+        """
+        keys = list(self._index) if names is None else list(names)
+        positions = [self._position(key) for key in keys]
+        missing = [key for key, position in zip(keys, positions) if position is None]
+        if missing:
+            raise ValueError(f"Students not found: {', '.join(map(str, missing))}")
+        return pd.Series(self._recommendations(positions), index=keys, name='Recommendations', dtype=object)
+
+    @instrumented(rows=lambda self, result: len(result))
+    def lookup_students(self, names):
+        """Analysis and recommendations for many students from one vectorized pass.
+
+        Returns one ``(analysis, recommendations)`` pair per name, in order, matching
+        analyze_student and get_recommendations; unknown students give None.
+        """
+        names = list(names)
+        positions = [self._position(name) for name in names]
+        found = [i for i, position in enumerate(positions) if position is not None]
+        results = [None] * len(names)
+        if found:
+            rows = [positions[i] for i in found]
+            frame = self._analysis_frame(np.asarray(rows, dtype=int))
+            analyses = self._analysis_records(rows, frame)
+            recommendations = self._recommendations(rows, frame)
+            for i, analysis, recs in zip(found, analyses, recommendations):
+                results[i] = (analysis, recs)
+        return results
+
+    def _recommendations(self, positions, frame=None):
+        """Recommendation lists for the rows at positions (reusing an analysis frame if given)."""
+        return evaluate_rules(self._rule_context(positions, frame), self.rules)
+
+    def _rule_context(self, positions, frame=None):
+        """The per-student table rule predicates and messages are evaluated against."""
+        positions = np.asarray(positions, dtype=int)
+        if frame is None:
+            context = self._analysis_columns(positions)
         else:
-            recommendations.append(f"Consider getting additional help with {analysis['Worst Subject']}.Percentage -{analysis['Percentage']} and average-{analysis['Average']}")
-            
-        return recommendations
+            context = {col: frame[col].to_numpy() for col in frame.columns}
+        scores = self._score_matrix()[positions]
+        whole = self._whole_subjects()
+        subject_index = None if whole.all() else {subject: i for i, subject in enumerate(self.subjects)}
+        for subject_col, col in (('Best Subject', 'Best Score'), ('Worst Subject', 'Worst Score')):
+            if subject_index is None:
+                context[col] = _plain_scores(context[col])
+            else:
+                codes = np.array([subject_index[subject] for subject in context[subject_col]], dtype=int)
+                context[col] = _plain_scores(context[col], whole[codes])
+
+        failing = scores < self._pass_marks()
+        context['Failing Count'] = failing.sum(axis=1)
+        context['Max Average'] = np.full(len(positions), subject_max_marks(self.subjects, self.max_marks).mean())
+        subjects = np.array(self.subjects, dtype=object)
+        if len(positions) == 1:
+            context['Failing Subjects'] = np.array([', '.join(subjects[failing[0]])], dtype=object)
+        else:
+            # Join subject names once per distinct failing pattern rather than once per student
+            patterns, inverse = np.unique(np.packbits(failing, axis=1), axis=0, return_inverse=True)
+            names = [', '.join(subjects[np.unpackbits(pattern)[:len(subjects)].astype(bool)]) for pattern in patterns]
+            context['Failing Subjects'] = np.array(names, dtype=object)[inverse.reshape(-1)]
+
+        for i, subject in enumerate(self.subjects):
+            if subject not in context:
+                context[subject] = scores[:, i]
+        # One DataFrame construction instead of a column insert per field
+        return pd.DataFrame(context)
     
+    @instrumented(rows=1)
     def plot_student_performance(self, student_name):
         """Create a  bar chart of student performance."""
-        if student_name not in self.data['Name'].values:
-            print(f"Student '{student_name}' not found.")
+        position = self._position(student_name)
+        if position is None:
+            logger.warning("Student '%s' not found.", student_name)
             return None
             
-        student_data = self.data[self.data['Name'] == student_name].iloc[0]
-        
-        plt.figure(figsize=(10, 6))
-        
-        # Create bars with different colors based on scores
-        bars = plt.bar(self.subjects, [student_data[subject] for subject in self.subjects])
-        
-        for bar, subject in zip(bars, self.subjects):
-            score = student_data[subject]
-            if score >= 80:
-                bar.set_color('green')
-            elif score >= 65:
-                bar.set_color('yellow')
-            else:
-                bar.set_color('red')
-        
-        # Add pass threshold line
-        plt.axhline(y=self.pass_threshold, color='r', linestyle='--', label=f'Pass Threshold')
-        
-        plt.title(f"{student_name}'s Performance")
-        plt.xlabel('Subjects')
-        plt.ylabel('Scores')
-        plt.ylim(0, 100)
-        plt.legend()
+        with open(f"{student_name}_scores.png", 'wb') as f:
+            f.write(self.get_chart_png(student_name))
         
-        # Save the figure
-        plt.savefig(f"{student_name}_scores.png")
-        plt.close()
+        logger.info("Chart saved as %s_scores.png", student_name)
+
+    @instrumented(rows=1)
+    def get_chart_png(self, student_name):
+        """Get a student's bar chart as PNG bytes, without touching the disk.
+
+        Rendered images are kept in an LRU cache keyed by student, subjects, scores
+        and pass threshold, so an unchanged chart is never rasterized twice.
+        """
+        position = self._position(student_name)
+        if position is None:
+            return None
+
+        with self._lock:
+            row = self._score_matrix()[position]
+            maxima = tuple(subject_max_marks(self.subjects, self.max_marks))
+            key = (student_name, tuple(self.subjects), row.tobytes(), self.pass_threshold, maxima)
+            if key in self._chart_cache:
+                self._chart_cache.move_to_end(key)
+                return self._chart_cache[key]
+
+            # Keep one figure around and only redraw the bars while the layout is unchanged
+            layout = (tuple(self.subjects), self.pass_threshold, maxima)
+            if self._renderer is None or self._renderer[0] != layout:
+                self._renderer = (layout, ChartRenderer(self.subjects, self.pass_threshold, self.max_marks))
+            buffer = BytesIO()
+            self._renderer[1].render(student_name, row, buffer)
+
+            png = self._chart_cache[key] = buffer.getvalue()
+            if len(self._chart_cache) > self.cache_size:
+                self._chart_cache.popitem(last=False)
+            return png
         
-        print(f"Chart saved as {student_name}_scores.png")
+    @instrumented(rows=lambda self, result: len(result))
+    def plot_all_students(self, output_dir='.', names=None, workers=None):
+        """Save a bar chart for every student (or just ``names``) into ``output_dir``.
+
+        Each batch reuses one figure. With ``workers`` > 1 the batches are rendered
+        in a process pool. Returns the list of chart paths.
+        """
+        if names is None:
+            keys = list(self._index)
+            positions = list(self._index.values())
+        else:
+            keys = list(names)
+            positions = [self._position(name) for name in keys]
+            missing = [name for name, position in zip(keys, positions) if position is None]
+            if missing:
+                raise ValueError(f"Students not found: {', '.join(map(str, missing))}")
+        os.makedirs(output_dir, exist_ok=True)
+
+        scores = self._score_matrix()
+        items = [(key, scores[position]) for key, position in zip(keys, positions)]
+        if not workers or workers == 1:
+            paths = _render_charts(self.subjects, self.pass_threshold, items, output_dir, self.max_marks)
+        else:
+            # A few batches per worker keeps the pool busy without redoing figure setup often
+            size = max(1, math.ceil(len(items) / (workers * 4)))
+            batches = [items[i:i + size] for i in range(0, len(items), size)]
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                results = pool.map(
+                    _render_charts,
+                    [self.subjects] * len(batches),
+                    [self.pass_threshold] * len(batches),
+                    batches,
+                    [output_dir] * len(batches),
+                    [self.max_marks] * len(batches),
+                )
+                paths = [path for batch_paths in results for path in batch_paths]
         
+        logger.info("%d charts saved in %s", len(paths), output_dir)
+        return paths
+
+    @instrumented(rows=1)
     def create_report(self, student_name):
         """Create a  text report for a student."""
         analysis = self.analyze_student(student_name)
@@ -157,48 +1308,346 @@ class StudentAnalyzer:
             return analysis
             
         recommendations = self.get_recommendations(student_name)
-        
-        report = [
-            f"STUDENT REPORT: {student_name}",
-            f"==========================",
-            f"",
-            f"Rank: {analysis['Rank']}",
-            f"Average Score: {analysis['Average']}",
-            f"Percentage:{analysis['Percentage']}",
-            f"Grade:{analysis['Grade']}",
-            f"",
-            f"SCORES:",
-        ]
-        
-        # Add each subject score
-        for subject, score in analysis['Scores'].items():
-            status = "PASS" if score >= self.pass_threshold else "FAIL"
-            report.append(f"{subject}: {score} ({status})")
-        
-        report.extend([
-            f"",
-            f"Best Subject: {analysis['Best Subject']}",
-            f"Worst Subject: {analysis['Worst Subject']}",
-            f"Percentage:{analysis['Percentage']}",
-            f"Grade:{analysis['Grade']}"
-            f"",
-            f"RECOMMENDATIONS:"
-        ])
-        
-        # Add recommendations
-        for i, rec in enumerate(recommendations, 1):
-            report.append(f"{i}. {rec}")
+        # The header shows the student's name even when looked up by id_column
+        report = format_report(analysis['Name'], analysis, recommendations, self.pass_threshold, self.max_marks)
             
         # Write report to file
         filename = f"{student_name}_report.txt"
         with open(filename, 'w') as f:
-            f.write('\n'.join(report))
+            f.write(report)
             
-        print(f"Report saved as {filename}")
+        logger.info("Report saved as %s", filename)
         return filename
 
+    @instrumented(rows=lambda self, result: len(self.data))
+    def create_all_reports(self, output_dir='.', archive=None, workers=None):
+        """Create the text report of every student from a single vectorized analysis.
+
+        ``archive`` selects the output: None writes one ``{key}_report.txt`` per
+        student (key being the Name, or id_column value), 'zip' writes them all into
+        ``reports.zip`` and 'jsonl' writes one ``{"Name": ..., "Report": ...}`` line
+        per student to ``reports.jsonl``, with the id_column value first if set.
+        Reports are rendered (and, for individual files, written) on a thread pool
+        of ``workers`` threads. Returns the list of files written.
+        """
+        if archive not in (None, 'zip', 'jsonl'):
+            raise ValueError("Unsupported archive format. Please use 'zip' or 'jsonl'.")
+        os.makedirs(output_dir, exist_ok=True)
+
+        keys = list(self._index)
+        positions = list(self._index.values())
+        frame = self._analysis_frame(np.asarray(positions, dtype=int))
+        analyses = self._analysis_records(positions, frame)
+        recommendations = self._recommendations(positions, frame)
+
+        def render(item):
+            key, analysis, recs = item
+            return format_report(analysis['Name'], analysis, recs, self.pass_threshold, self.max_marks)
+
+        def write(item):
+            key, report = item
+            filename = os.path.join(output_dir, f"{key}_report.txt")
+            with open(filename, 'w') as f:
+                f.write(report)
+            return filename
+
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            reports = list(pool.map(render, zip(keys, analyses, recommendations)))
+            if archive is None:
+                files = list(pool.map(write, zip(keys, reports)))
+
+        if archive == 'zip':
+            filename = os.path.join(output_dir, 'reports.zip')
+            with zipfile.ZipFile(filename, 'w', zipfile.ZIP_DEFLATED) as zf:
+                for key, report in zip(keys, reports):
+                    zf.writestr(f"{key}_report.txt", report)
+            files = [filename]
+        elif archive == 'jsonl':
+            filename = os.path.join(output_dir, 'reports.jsonl')
+            with open(filename, 'w') as f:
+                for key, analysis, report in zip(keys, analyses, reports):
+                    record = {self.id_column: key} if self.id_column else {}
+                    record.update({'Name': analysis['Name'], 'Report': report})
+                    f.write(json.dumps(record, default=str) + '\n')
+            files = [filename]
+
+        logger.info("%d reports saved in %s", len(reports), output_dir)
+        return files
+
+class StreamingAnalyzer:
+    """Class statistics and rankings for CSV gradebooks too large to load at once.
+
+    The file is read in chunks; only running per-subject aggregates and one
+    total per student are kept, never the raw score rows.
+    """
+
+    def __init__(self, file_path=None, chunksize=100_000, rank_method='competition', subjects=None,
+                 max_marks=100):
+        """Initialize and, if ``file_path`` is given, stream it in right away.
+
+        ``subjects`` fixes the subject columns; by default they are taken from the
+        first chunk (every column except Name). ``max_marks`` is as for StudentAnalyzer.
+        """
+        if rank_method not in RANK_METHODS:
+            raise ValueError(f"Unsupported rank method '{rank_method}'. Use one of: {', '.join(RANK_METHODS)}")
+        self.file_path = file_path
+        self.chunksize = chunksize
+        self.rank_method = rank_method
+        self.pass_threshold = 50  # Default passing score (percent of each subject's maximum)
+        self.max_marks = max_marks
+        self.subjects = None
+        if subjects is not None:
+            self._init_aggregates(subjects)
+        self.num_students = 0
+        self._names = []
+        self._totals = []
+        if file_path is not None:
+            self.load_data()
+
+    @instrumented(rows=lambda self, result: self.num_students)
+    def load_data(self):
+        """Stream the CSV file chunk by chunk into the running aggregates."""
+        if os.path.splitext(self.file_path)[1].lower() != '.csv':
+            raise ValueError("Streaming mode only supports CSV files.")
+        for chunk in pd.read_csv(self.file_path, chunksize=self.chunksize):
+            self.update(chunk)
+        logger.info("Data streamed: %d students, %d subjects", self.num_students, len(self.subjects or []))
+
+    @classmethod
+    @instrumented(rows=lambda cls, result: result.num_students)
+    def from_files(cls, sources, spill_dir, key_column='Name', workers=None, aggregate='last',
+                   partitions=16, rank_method='competition', max_marks=100):
+        """Merge several gradebooks out of core and aggregate the result.
+
+        Each file is parsed (in a process pool with ``workers`` > 1) and split by a
+        hash of ``key_column`` into ``partitions`` files under ``spill_dir``. Every
+        partition then holds all rows of its students, so partitions are merged
+        (see merge_gradebooks) and folded in one at a time; only one partition is
+        in memory at once.
+        """
+        paths = expand_sources(sources)
+        os.makedirs(spill_dir, exist_ok=True)
+        scratch = tempfile.mkdtemp(dir=spill_dir)
+        try:
+            args = (paths, [key_column] * len(paths), [scratch] * len(paths),
+                    [partitions] * len(paths), range(len(paths)))
+            if not workers or workers == 1:
+                results = list(map(_partition_gradebook_file, *args))
+            else:
+                with ProcessPoolExecutor(max_workers=workers) as pool:
+                    results = list(pool.map(_partition_gradebook_file, *args))
+            file_subjects = [subjects for subjects, _ in results]
+            for path, (_, duplicates) in zip(paths, results):
+                _warn_duplicate_names(path, duplicates)
+
+            subjects = list(dict.fromkeys(col for cols in file_subjects for col in cols))
+            streaming = cls(rank_method=rank_method, subjects=subjects, max_marks=max_marks)
+            for part in range(partitions):
+                pieces = [pd.read_pickle(piece) for piece in sorted(glob.glob(os.path.join(scratch, f"part-{part}-*.pkl")))]
+                if pieces:
+                    streaming.update(merge_gradebooks(pieces, key_column, aggregate))
+        finally:
+            shutil.rmtree(scratch, ignore_errors=True)
+        logger.info("Data merged: %d students, %d subjects from %d files",
+                    streaming.num_students, len(subjects), len(paths))
+        return streaming
+
+    def _init_aggregates(self, subjects):
+        self.subjects = list(subjects)
+        size = len(self.subjects)
+        self._count = np.zeros(size, dtype=np.int64)
+        self._sum = np.zeros(size)
+        self._min = np.full(size, np.inf)
+        self._max = np.full(size, -np.inf)
+        self._sum_squares = np.zeros(size)
+        self._whole = np.ones(size, dtype=bool)
+        self.sketch = ScoreSketch(size, high=subject_max_marks(self.subjects, self.max_marks))
+
+    def update(self, chunk):
+        """Fold one DataFrame chunk (Name plus subject columns) into the aggregates."""
+        if self.subjects is None:
+            self._init_aggregates([col for col in chunk.columns if col != 'Name'])
+
+        scores = chunk.reindex(columns=self.subjects).apply(pd.to_numeric, errors='coerce').to_numpy(dtype=float)
+        present = ~np.isnan(scores)
+        self._count += present.sum(axis=0)
+        self._sum += np.where(present, scores, 0).sum(axis=0)
+        self._min = np.fmin(self._min, np.where(present, scores, np.inf).min(axis=0, initial=np.inf))
+        self._max = np.fmax(self._max, np.where(present, scores, -np.inf).max(axis=0, initial=-np.inf))
+        self._sum_squares += (np.where(present, scores, 0) ** 2).sum(axis=0)
+        self._whole &= whole_columns(scores)
+        self.sketch.update(scores)
+
+        self._names.append(chunk['Name'].to_numpy())
+        self._totals.append(np.nansum(scores, axis=1))
+        self.num_students += len(chunk)
+
+    @instrumented(rows=lambda self, result: self.num_students)
+    def get_class_stats(self, extended=False):
+        """Get Average/Highest/Lowest per subject, in the same shape as StudentAnalyzer.
+
+        With ``extended``, Median/Q1/Q3 and Pass Rate come from the score sketch:
+        they match StudentAnalyzer for scores on the sketch's grid (whole and half
+        marks by default) and are otherwise within one bin width. Std and the
+        Histogram are exact.
+        """
+        stats = {}
+        for i, subject in enumerate(self.subjects or []):
+            has_scores = self._count[i] > 0
+            stats[subject] = {
+                'Average': round(float(self._sum[i] / self._count[i]), 1) if has_scores else np.nan,
+                'Highest': _score_value(self._max[i], self._whole[i]) if has_scores else np.nan,
+                'Lowest': _score_value(self._min[i], self._whole[i]) if has_scores else np.nan,
+            }
+
+        if extended and self.subjects:
+            q1, median, q3 = self.sketch.quantiles([0.25, 0.5, 0.75])
+            with np.errstate(invalid='ignore', divide='ignore'):
+                means = self._sum / self._count
+                std = np.sqrt(np.maximum(self._sum_squares / self._count - means ** 2, 0))
+                marks = pass_marks(self.pass_threshold, subject_max_marks(self.subjects, self.max_marks))
+                pass_rates = self.sketch.count_at_least(marks) / self._count * 100
+            histograms = self.sketch.histogram(10)
+            for i, subject in enumerate(self.subjects):
+                stats[subject].update(_extended_stats(
+                    median[i], q1[i], q3[i], std[i], pass_rates[i], histograms[i]
+                ))
+        return stats
+
+    @instrumented(rows=lambda self, result: len(result))
+    def get_rankings(self):
+        """Get the class ranking table ordered by rank (ties keep file order)."""
+        if not self._names:
+            return ranking_table([], [], 0, self.rank_method)
+        ranking = ranking_table(
+            np.concatenate(self._names),
+            np.concatenate(self._totals),
+            subject_max_marks(self.subjects, self.max_marks).sum(),
+            self.rank_method,
+        )
+        return ranking.sort_values('Rank', kind='stable').reset_index(drop=True)
+
+PIPELINE_STAGES = ('stats', 'analysis', 'recommendations', 'charts', 'reports')
+OUTPUT_FORMATS = ('json', 'csv', 'parquet')
+
+def write_table(frame, path, output_format):
+    """Write a DataFrame as JSON records, CSV or Parquet; returns the file written."""
+    filename = f"{path}.{output_format}"
+    if output_format == 'json':
+        frame.to_json(filename, orient='records', indent=2, default_handler=str)
+    elif output_format == 'csv':
+        # Lists (recommendations, histograms) become one '; '-separated cell
+        frame = frame.apply(lambda col: col.map(
+            lambda v: '; '.join(map(str, v)) if isinstance(v, list) else v
+        ) if col.dtype == object else col)
+        frame.to_csv(filename, index=False)
+    elif output_format == 'parquet':
+        frame.to_parquet(filename, index=False)
+    else:
+        raise ValueError(f"Unsupported output format '{output_format}'. Use one of: {', '.join(OUTPUT_FORMATS)}")
+    return filename
+
+def run_pipeline(sources, output_dir, workers=None, output_format='json', stages=PIPELINE_STAGES,
+                 key_column='Name', aggregate='last', archive=None, **kwargs):
+    """Run the batch pipeline: load, then class stats, analyses, recommendations, charts, reports.
+
+    ``sources`` are gradebook paths or globs (several files are merged, see
+    from_files). Tables go to ``output_dir`` as ``class_stats``, ``analysis`` and
+    ``recommendations`` in ``output_format``; charts and reports into its
+    ``charts``/``reports`` subdirectories. ``workers`` sizes the pools used to
+    parse files, render charts and write reports. Other keyword arguments go to
+    StudentAnalyzer. Returns a summary (also written as ``summary.json``).
+    """
+    unknown = [stage for stage in stages if stage not in PIPELINE_STAGES]
+    if unknown:
+        raise ValueError(f"Unknown stages: {', '.join(unknown)}")
+    if output_format not in OUTPUT_FORMATS:
+        raise ValueError(f"Unsupported output format '{output_format}'. Use one of: {', '.join(OUTPUT_FORMATS)}")
+    os.makedirs(output_dir, exist_ok=True)
+    summary = {'inputs': expand_sources(sources), 'timings': {}, 'outputs': {}}
+
+    def timed(stage, func):
+        start = time.perf_counter()
+        result = func()
+        summary['timings'][stage] = round(time.perf_counter() - start, 4)
+        logger.info("Stage %s finished in %.2f s", stage, summary['timings'][stage])
+        return result
+
+    paths = summary['inputs']
+    if key_column != 'Name':
+        kwargs.setdefault('id_column', key_column)
+    if len(paths) == 1:
+        analyzer = timed('load', lambda: StudentAnalyzer(paths[0], **kwargs))
+    else:
+        analyzer = timed('load', lambda: StudentAnalyzer.from_files(paths, key_column, workers, aggregate, **kwargs))
+    summary['students'] = len(analyzer.data)
+    summary['subjects'] = list(analyzer.subjects)
+
+    if 'stats' in stages:
+        stats = timed('stats', lambda: analyzer.get_class_stats(extended=True))
+        frame = pd.DataFrame(stats).T.rename_axis('Subject').reset_index()
+        summary['outputs']['stats'] = write_table(frame, os.path.join(output_dir, 'class_stats'), output_format)
+    if 'analysis' in stages:
+        frame = timed('analysis', analyzer.analyze_all)
+        summary['outputs']['analysis'] = write_table(frame, os.path.join(output_dir, 'analysis'), output_format)
+    if 'recommendations' in stages:
+        recommendations = timed('recommendations', analyzer.recommend_all)
+        frame = recommendations.rename_axis(analyzer.id_column or 'Name').reset_index()
+        summary['outputs']['recommendations'] = write_table(
+            frame, os.path.join(output_dir, 'recommendations'), output_format
+        )
+    if 'charts' in stages:
+        charts = timed('charts', lambda: analyzer.plot_all_students(os.path.join(output_dir, 'charts'), workers=workers))
+        summary['outputs']['charts'] = len(charts)
+    if 'reports' in stages:
+        reports = timed('reports', lambda: analyzer.create_all_reports(
+            os.path.join(output_dir, 'reports'), archive=archive, workers=workers
+        ))
+        summary['outputs']['reports'] = reports[0] if archive else len(reports)
+
+    with open(os.path.join(output_dir, 'summary.json'), 'w') as f:
+        json.dump(summary, f, indent=2)
+    return summary
+
+def main(argv=None):
+    """Command line entry point: ``python -m student_analyzer run --input ... --out ...``."""
+    parser = argparse.ArgumentParser(prog='student_analyzer', description="Analyze student gradebooks.")
+    commands = parser.add_subparsers(dest='command', required=True)
+    run = commands.add_parser('run', help="run the batch pipeline over one or more gradebooks")
+    run.add_argument('--input', '-i', nargs='+', required=True, help="CSV/Excel files or glob patterns")
+    run.add_argument('--out', '-o', default='results', help="output directory (default: results)")
+    run.add_argument('--jobs', '-j', type=int, default=1, help="worker processes/threads (default: 1)")
+    run.add_argument('--format', '-f', dest='output_format', choices=OUTPUT_FORMATS, default='json')
+    run.add_argument('--stages', nargs='+', choices=PIPELINE_STAGES, default=list(PIPELINE_STAGES))
+    run.add_argument('--key-column', default='Name', help="column identifying a student across files")
+    run.add_argument('--aggregate', default='last', help="how to combine a student's scores from several files")
+    run.add_argument('--archive', choices=['zip', 'jsonl'], help="bundle the reports into one file")
+    run.add_argument('--rank-method', choices=list(RANK_METHODS), default='competition')
+    run.add_argument('--max-marks', type=float, default=100)
+    run.add_argument('--grading', help="JSON grading scheme (see GradingScheme.from_config)")
+    run.add_argument('--cache-dir', help="reuse parsed gradebooks from this GradebookCache directory")
+    run.add_argument('--quiet', '-q', action='store_true', help="only log warnings")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.WARNING if args.quiet else logging.INFO,
+                        format='%(asctime)s %(levelname)s %(message)s')
+    summary = run_pipeline(
+        args.input, args.out, workers=args.jobs, output_format=args.output_format, stages=args.stages,
+        key_column=args.key_column, aggregate=args.aggregate, archive=args.archive,
+        rank_method=args.rank_method, max_marks=args.max_marks, cache_dir=args.cache_dir,
+        grading=GradingScheme.from_config(args.grading) if args.grading else None,
+    )
+    logger.info("Pipeline complete: %d students, results in %s", summary['students'], args.out)
+    return 0
+
 # Example usage
 if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        sys.exit(main())
+
+    # Show the status messages (data loaded, chart/report saved) on the console
+    logging.basicConfig(level=logging.INFO, format='%(message)s', stream=sys.stdout)
+
     # Create sample data
     sample_data = pd.DataFrame({
         'Name': ['Alex', 'Beth', 'Carlos', 'Diana', 'Ethan'],
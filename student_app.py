@@ -1,10 +1,10 @@
 import streamlit as st
 import pandas as pd
-import matplotlib.pyplot as plt
+import logging
 import os
-from io import BytesIO
-import plotly.express as px
 
+from gradebook_cache import DEFAULT_CACHE_DIR, content_hash
+from instrumentation import configure_from_env
 from student_analyzer import StudentAnalyzer
 
 # Page configuration
@@ -83,6 +83,55 @@ st.markdown("""
 </div>
 """, unsafe_allow_html=True)
 
+# Opt-in per-stage timings, e.g. STUDENT_ANALYZER_METRICS=log,prometheus:/path/to/student_app.prom
+@st.cache_resource
+def setup_instrumentation():
+    sinks = configure_from_env()
+    if sinks:
+        logging.basicConfig(level=logging.INFO)
+    return sinks
+
+setup_instrumentation()
+
+# Cached pipeline: everything below is keyed by the hash of the uploaded file, so
+# widget interactions only recompute the selected student's view
+@st.cache_resource(show_spinner="Loading student data...", max_entries=8)
+def load_analyzer(file_hash, file_ext, _file_bytes):
+    return StudentAnalyzer.from_buffer(_file_bytes, file_ext, cache_dir=DEFAULT_CACHE_DIR)
+
+@st.cache_data(show_spinner=False, max_entries=8)
+def load_class_overview(file_hash, _analyzer):
+    return _analyzer.get_class_stats(), _analyzer.data['Name'].tolist()
+
+@st.cache_resource(show_spinner=False, max_entries=8)
+def build_stats_chart(file_hash, _stats):
+    # Deferred: plotly is only needed once a file has been uploaded
+    import plotly.express as px
+
+    average_scores = {subject: values['Average'] for subject, values in _stats.items()}
+    names = list(average_scores.keys())
+    values = list(average_scores.values())
+
+    # Create enhanced chart
+    fig = px.pie(
+        names=names,
+        values=values,
+        title="Students' Favorite Subjects (Based on Average Scores)",
+        color_discrete_sequence=px.colors.qualitative.Set3
+    )
+    fig.update_traces(
+        textinfo='label+percent', 
+        textfont_size=14,
+        marker=dict(line=dict(color='#FFFFFF', width=2))
+    )
+    fig.update_layout(
+        title_font_size=18,
+        font=dict(size=12),
+        showlegend=True,
+        height=500
+    )
+    return fig
+
 # Upload section with enhanced styling
 st.markdown("""
 <div class="upload-area">
@@ -98,18 +147,11 @@ if uploaded_file is not None:
         file_name = uploaded_file.name
         file_ext = os.path.splitext(file_name)[1].lower()
 
-        # Read uploaded file
-        if file_ext == '.csv':
-            df = pd.read_csv(uploaded_file)
-        else:
-            df = pd.read_excel(uploaded_file)
-
-        # Save a temp file
-        temp_file = 'uploaded_file' + file_ext
-        df.to_csv(temp_file, index=False) if file_ext == '.csv' else df.to_excel(temp_file, index=False)
-
-        # Initialize analyzer
-        analyzer = StudentAnalyzer(temp_file)
+        # Initialize analyzer (parsed once per distinct file content)
+        file_bytes = uploaded_file.getvalue()
+        file_hash = content_hash(file_bytes)
+        analyzer = load_analyzer(file_hash, file_ext, file_bytes)
+        stats, student_name = load_class_overview(file_hash, analyzer)
         
         # Success message with custom styling
         st.markdown("""
@@ -118,7 +160,7 @@ if uploaded_file is not None:
             <h4>✅ File uploaded successfully!</h4>
             <p>Found {num_students} students in your dataset</p>
         </div>
-        """.format(num_students=len(df)), unsafe_allow_html=True)
+        """.format(num_students=len(student_name)), unsafe_allow_html=True)
 
         # Display Class Statistics
         st.markdown("""
@@ -127,29 +169,7 @@ if uploaded_file is not None:
         </div>
         """, unsafe_allow_html=True)
 
-        stats = analyzer.get_class_stats()
-        average_scores = {subject: values['Average'] for subject, values in stats.items()}
-        names = list(average_scores.keys())
-        values = list(average_scores.values())
-
-        # Create enhanced chart
-        fig = px.pie(
-            names=names,
-            values=values,
-            title="Students' Favorite Subjects (Based on Average Scores)",
-            color_discrete_sequence=px.colors.qualitative.Set3
-        )
-        fig.update_traces(
-            textinfo='label+percent', 
-            textfont_size=14,
-            marker=dict(line=dict(color='#FFFFFF', width=2))
-        )
-        fig.update_layout(
-            title_font_size=18,
-            font=dict(size=12),
-            showlegend=True,
-            height=500
-        )
+        fig = build_stats_chart(file_hash, stats)
 
         # Layout: Chart and Table side-by-side
         col1, col2 = st.columns([2, 1])
@@ -172,7 +192,6 @@ if uploaded_file is not None:
         
         col1, col2 = st.columns([2, 1])
         with col1:
-            student_name = df["Name"].tolist()
             selected_student = st.selectbox(
                 "Choose a student to analyze:", 
                 student_name,
@@ -240,8 +259,7 @@ if uploaded_file is not None:
                 
             with col2:
                 st.markdown("#### 📉 Performance Visualization")
-                analyzer.plot_student_performance(selected_student)
-                st.image(f"{selected_student}_scores.png")
+                st.image(analyzer.get_chart_png(selected_student))
 
             # Enhanced recommendations section
             with st.expander("💡 Personalized Recommendations", expanded=True):
@@ -0,0 +1,260 @@
+import argparse
+import asyncio
+import json
+import logging
+import math
+import multiprocessing
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import suppress
+from http import HTTPStatus
+from urllib.parse import parse_qs, unquote, urlsplit
+
+import numpy as np
+
+from gradebook_cache import DEFAULT_CACHE_DIR
+from student_analyzer import StudentAnalyzer
+
+logger = logging.getLogger('student_analyzer.service')
+
+def _json_safe(value):
+    """Replace NaN (missing scores) with None so the payload is strict JSON."""
+    if isinstance(value, float) and math.isnan(value):
+        return None
+    if isinstance(value, dict):
+        return {key: _json_safe(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_json_safe(item) for item in value]
+    return value
+
+class StudentBatcher:
+    """Coalesces concurrent per-student lookups into one StudentAnalyzer.lookup_students call.
+
+    Lookups arriving within ``max_delay`` seconds of each other (up to ``max_batch``
+    distinct students) share a single vectorized pass, which runs on ``executor``
+    so the event loop keeps accepting requests meanwhile.
+    """
+
+    def __init__(self, analyzer, executor=None, max_delay=0.002, max_batch=1024):
+        self.analyzer = analyzer
+        self.executor = executor
+        self.max_delay = max_delay
+        self.max_batch = max_batch
+        self._pending = {}
+        self._timer = None
+        self._tasks = set()
+
+    async def lookup(self, key):
+        """Return ``(analysis, recommendations)`` for one student, or None if unknown."""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.setdefault(key, []).append(future)
+        if len(self._pending) >= self.max_batch:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_delay, self._flush)
+        return await future
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        pending, self._pending = self._pending, {}
+        if pending:
+            task = asyncio.ensure_future(self._run(pending))
+            # Keep a reference until the batch is done, so it is not garbage collected
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, pending):
+        keys = list(pending)
+        loop = asyncio.get_running_loop()
+        try:
+            results = await loop.run_in_executor(self.executor, self.analyzer.lookup_students, keys)
+        except Exception as error:
+            results = [error] * len(keys)
+        for key, result in zip(keys, results):
+            for future in pending[key]:
+                if future.done():
+                    continue
+                if isinstance(result, Exception):
+                    future.set_exception(result)
+                else:
+                    future.set_result(result)
+
+class StudentService:
+    """HTTP/JSON API over one shared, read-only StudentAnalyzer.
+
+        GET /students/<key>                   analyze_student
+        GET /students/<key>/recommendations   get_recommendations
+        GET /stats[?extended=1]               get_class_stats
+        GET /health
+
+    ``<key>`` is the student's Name, or id_column value if the analyzer has one.
+    Concurrent student requests are batched (see StudentBatcher).
+
+    The service never modifies the analyzer, and nothing else may while it is
+    serving: lookups run on worker threads without a lock, so an upsert_students
+    or remove_students call could hand out analyses of half-updated data. Reload
+    by starting a new service (or process) on the updated gradebook instead.
+    """
+
+    def __init__(self, analyzer, executor=None, max_delay=0.002, max_batch=1024):
+        self.analyzer = analyzer
+        self.executor = executor
+        self.batcher = StudentBatcher(analyzer, executor, max_delay, max_batch)
+        # The dataset never changes while serving, so class stats are computed once
+        self._stats = {}
+        id_column = analyzer.id_column
+        self._integer_keys = bool(id_column) and np.issubdtype(analyzer.data[id_column].dtype, np.integer)
+
+    def _parse_key(self, key):
+        if self._integer_keys and key.lstrip('-').isdigit():
+            return int(key)
+        return key
+
+    async def class_stats(self, extended=False):
+        if extended not in self._stats:
+            loop = asyncio.get_running_loop()
+            self._stats[extended] = await loop.run_in_executor(
+                self.executor, self.analyzer.get_class_stats, extended
+            )
+        return self._stats[extended]
+
+    async def route(self, method, target):
+        """Answer one request; returns ``(status, payload)``."""
+        if method != 'GET':
+            return HTTPStatus.METHOD_NOT_ALLOWED, {'error': "Only GET is supported."}
+        url = urlsplit(target)
+        parts = [unquote(part) for part in url.path.strip('/').split('/')]
+        query = parse_qs(url.query)
+
+        if parts == ['health']:
+            return HTTPStatus.OK, {'status': 'ok', 'students': len(self.analyzer.data)}
+        if parts == ['stats']:
+            extended = query.get('extended', ['0'])[0].lower() in ('1', 'true', 'yes')
+            return HTTPStatus.OK, await self.class_stats(extended)
+        if parts[0] == 'students' and (len(parts) == 2 or parts[2:] == ['recommendations']):
+            result = await self.batcher.lookup(self._parse_key(parts[1]))
+            if result is None:
+                return HTTPStatus.NOT_FOUND, {'error': f"Student '{parts[1]}' not found."}
+            analysis, recommendations = result
+            if len(parts) == 2:
+                return HTTPStatus.OK, analysis
+            return HTTPStatus.OK, {'Name': analysis['Name'], 'Recommendations': recommendations}
+        return HTTPStatus.NOT_FOUND, {'error': f"Unknown path '{url.path}'."}
+
+    async def handle(self, reader, writer):
+        """Serve the requests of one (keep-alive) connection."""
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b'\r\n', b'\n', b''):
+                        break
+                    name, _, value = line.decode('latin-1').partition(':')
+                    headers[name.strip().lower()] = value.strip()
+
+                try:
+                    method, target, version = request_line.decode('latin-1').split()
+                    length = int(headers.get('content-length') or 0)
+                except ValueError:
+                    status, payload, keep_alive = HTTPStatus.BAD_REQUEST, {'error': "Malformed request."}, False
+                else:
+                    if length:
+                        await reader.readexactly(length)
+                    connection = headers.get('connection', '').lower()
+                    keep_alive = connection == 'keep-alive' or (version == 'HTTP/1.1' and connection != 'close')
+                    try:
+                        status, payload = await self.route(method, target)
+                    except Exception:
+                        logger.exception("Request %s %s failed", method, target)
+                        status, payload = HTTPStatus.INTERNAL_SERVER_ERROR, {'error': "Internal server error."}
+
+                body = json.dumps(_json_safe(payload), default=str).encode()
+                writer.write(
+                    f"HTTP/1.1 {status.value} {status.phrase}\r\n"
+                    f"Content-Type: application/json\r\n"
+                    f"Content-Length: {len(body)}\r\n"
+                    f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode() + body
+                )
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+            with suppress(ConnectionError):
+                await writer.wait_closed()
+
+    async def start(self, host='127.0.0.1', port=8000, reuse_port=False):
+        """Start listening and return the asyncio server."""
+        return await asyncio.start_server(self.handle, host, port, reuse_port=reuse_port or None)
+
+def _serve_worker(source, host, port, threads, cache_dir, reuse_port, analyzer_kwargs):
+    """Run one server process until interrupted."""
+    # A cache hit memory-maps the score matrix read-only, so every worker process
+    # shares the same physical pages instead of holding its own copy
+    analyzer = StudentAnalyzer(source, cache_dir=cache_dir, **analyzer_kwargs)
+
+    async def run():
+        with ThreadPoolExecutor(max_workers=threads) as executor:
+            server = await StudentService(analyzer, executor).start(host, port, reuse_port)
+            logger.info("Serving %d students on http://%s:%d", len(analyzer.data), host, port)
+            async with server:
+                await server.serve_forever()
+
+    with suppress(KeyboardInterrupt):
+        asyncio.run(run())
+
+def serve(source, host='127.0.0.1', port=8000, processes=1, threads=None, cache_dir=DEFAULT_CACHE_DIR,
+          **analyzer_kwargs):
+    """Serve a gradebook over HTTP from ``processes`` worker processes sharing one port.
+
+    The file is parsed once into the GradebookCache at ``cache_dir``; workers load
+    it from there (memory-mapped, read-only). ``threads`` sizes each worker's pool
+    for the batched lookups. Several processes need SO_REUSEPORT (Linux, BSD).
+
+    The gradebook is served read-only: each worker's analyzer is never updated
+    (see StudentService), so to publish new scores, restart the service on the
+    new file; the cache parses it once on the next start.
+    """
+    # Parse once up front, so the workers all start from the cache
+    StudentAnalyzer(source, cache_dir=cache_dir, **analyzer_kwargs)
+    args = (source, host, port, threads, cache_dir, processes > 1, analyzer_kwargs)
+    if processes == 1:
+        _serve_worker(*args)
+        return
+    workers = [multiprocessing.Process(target=_serve_worker, args=args) for _ in range(processes)]
+    for worker in workers:
+        worker.start()
+    try:
+        for worker in workers:
+            worker.join()
+    except KeyboardInterrupt:
+        for worker in workers:
+            worker.join()
+
+def main(argv=None):
+    """Command line entry point: ``python -m student_service --input gradebook.csv --port 8000``."""
+    parser = argparse.ArgumentParser(prog='student_service', description="Serve student analyses as HTTP/JSON.")
+    parser.add_argument('--input', '-i', required=True, help="CSV/Excel gradebook to serve")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', '-p', type=int, default=8000)
+    parser.add_argument('--processes', type=int, default=1, help="server processes sharing the port")
+    parser.add_argument('--threads', type=int, help="threads per process for batched lookups")
+    parser.add_argument('--cache-dir', default=DEFAULT_CACHE_DIR)
+    parser.add_argument('--id-column', help="look students up by this column instead of Name")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s %(message)s')
+    serve(args.input, args.host, args.port, args.processes, args.threads, args.cache_dir,
+          id_column=args.id_column)
+    return 0
+
+if __name__ == '__main__':
+    raise SystemExit(main())